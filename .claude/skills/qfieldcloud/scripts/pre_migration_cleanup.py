@@ -4,76 +4,206 @@ QFieldCloud Pre-Migration Cleanup Script
 Executes cleanup tasks to prepare for server migration
 """
 
+import io
 import os
 import sys
+import json
+import shlex
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+from ssh_base import SSHBase
+
+# Old job rows deleted per transaction in clean_old_jobs
+JOB_DELETE_BATCH = 10000
+
+# Run remotely with mount points as arguments; prints {path: [total, used, free]}
+# in bytes, straight from statvfs, so no locale-dependent df output is parsed
+DISK_USAGE_PY = """import os, json, sys
+def usage(path):
+    s = os.statvfs(path)
+    return [s.f_blocks * s.f_frsize, (s.f_blocks - s.f_bfree) * s.f_frsize, s.f_bavail * s.f_frsize]
+print(json.dumps({p: usage(p) for p in sys.argv[1:] if os.path.exists(p)}))"""
+
+# Docker prune escalates through these 'until' ages, stopping once disk usage
+# drops below DOCKER_PRUNE_TARGET percent
+DOCKER_PRUNE_AGES = ('168h', '72h', '24h')
+DOCKER_PRUNE_TARGET = 70
+
+# Long-lived psql session in the DB container; each query is followed by an
+# \echo of PSQL_SENTINEL so its output can be read back up to that line
+PSQL_COMMAND = "docker exec -i qfieldcloud-db-1 psql -U qfieldcloud_db_admin -d qfieldcloud_db -q -A -t 2>&1"
+PSQL_SENTINEL = '---END---'
+
+# Most stuck jobs (pending/queued for over a day) marked failed per run
+STUCK_JOB_LIMIT = 1000
+
+# psql script for clean_old_jobs: counts land in psql variables and are echoed
+# on one "STATS" line. {fail_stuck} is empty for a dry run, otherwise
+# JOB_FAIL_STUCK_CTE, so the stats scan and the stuck-job update are one
+# statement. The session has no ON_ERROR_STOP (an error would end it), so the
+# variables are cleared first and the STATS line is only echoed if they were set.
+JOB_STATS_SQL = """\\unset total_jobs
+\\unset old_jobs
+{fail_stuck}SELECT
+    COUNT(*) AS total_jobs,
+    COUNT(CASE WHEN created_at < NOW() - INTERVAL '30 days' THEN 1 END) AS old_jobs,
+    COUNT(CASE WHEN status IN ('pending','queued') AND created_at < NOW() - INTERVAL '1 day' THEN 1 END) AS stuck_jobs,
+    {failed_jobs} AS failed_jobs
+FROM core_job \\gset
+\\if :{{?total_jobs}}
+\\echo STATS :total_jobs :old_jobs :stuck_jobs :failed_jobs
+\\endif
+"""
+
+JOB_FAIL_STUCK_CTE = f"""WITH failed AS (
+    UPDATE core_job SET status = 'failed', finished_at = NOW(),
+        output = 'Auto-cleanup: stuck >24 hours'
+    WHERE ctid = ANY(ARRAY(
+        SELECT ctid FROM core_job
+        WHERE status IN ('pending','queued') AND created_at < NOW() - INTERVAL '1 day'
+        LIMIT {STUCK_JOB_LIMIT}))
+    RETURNING 1
+)
+"""
+
+# Appended to JOB_STATS_SQL - deletes old jobs, committing each batch so locks
+# and WAL bursts stay short. Skipped if the stats query failed.
+JOB_DELETE_SQL = f"""\\if :{{?old_jobs}}
+SELECT :old_jobs > 0 AS has_old \\gset
+\\else
+\\set has_old false
+\\endif
+\\if :has_old
+DO $$
+DECLARE
+    batch integer;
+    total integer := 0;
+BEGIN
+    LOOP
+        DELETE FROM core_job WHERE ctid = ANY(ARRAY(
+            SELECT ctid FROM core_job
+            WHERE created_at < NOW() - INTERVAL '30 days'
+            LIMIT {JOB_DELETE_BATCH}));
+        GET DIAGNOSTICS batch = ROW_COUNT;
+        EXIT WHEN batch = 0;
+        total := total + batch;
+        COMMIT;
+    END LOOP;
+    RAISE NOTICE 'DELETED %', total;
+END $$;
+\\endif
+"""
+
 # Color formatting functions
+COLORS = {
+    'red': '\033[91m',
+    'green': '\033[92m',
+    'yellow': '\033[93m',
+    'blue': '\033[94m',
+    'cyan': '\033[96m',
+    'white': '\033[97m',
+    'reset': '\033[0m',
+    'bold': '\033[1m'
+}
+
+@lru_cache(maxsize=256)
 def colored(text, color, bold=False):
     """Simple colored text output"""
-    colors = {
-        'red': '\033[91m',
-        'green': '\033[92m',
-        'yellow': '\033[93m',
-        'blue': '\033[94m',
-        'cyan': '\033[96m',
-        'white': '\033[97m',
-        'reset': '\033[0m',
-        'bold': '\033[1m'
-    }
-
-    color_code = colors.get(color, '')
-    bold_code = colors['bold'] if bold else ''
-    return f"{bold_code}{color_code}{text}{colors['reset']}"
+    color_code = COLORS.get(color, '')
+    bold_code = COLORS['bold'] if bold else ''
+    return f"{bold_code}{color_code}{text}{COLORS['reset']}"
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
 
 def format_size(bytes):
     """Format bytes to human readable size"""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes < 1024.0:
-            return f"{bytes:.2f} {unit}"
-        bytes /= 1024.0
-    return f"{bytes:.2f} PB"
+    # Each unit is 10 more bits, so the unit comes straight from the bit length
+    i = min(max(int(bytes).bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+    return f"{bytes / (1 << (10 * i)):.2f} {_SIZE_UNITS[i]}"
 
-class QFieldCleanup:
-    def __init__(self):
-        self.vps_host = os.getenv('QFIELDCLOUD_VPS_HOST', '72.61.166.168')
-        self.vps_user = os.getenv('QFIELDCLOUD_VPS_USER', 'root')
-        self.vps_password = os.getenv('QFIELDCLOUD_VPS_PASSWORD')
-        self.project_path = os.getenv('QFIELDCLOUD_PROJECT_PATH', '/opt/qfieldcloud')
+class _ThreadOutput:
+    """stdout stand-in that collects output per worker thread
 
-    def execute_ssh_command(self, command, timeout=30):
-        """Execute command on VPS via SSH"""
-        ssh_cmd = ['ssh']
+    Threads that set .local.buffer write there; all others (the main thread)
+    write through to the real stream.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
 
-        ssh_options = [
-            '-o', 'StrictHostKeyChecking=no',
-            '-o', 'ConnectTimeout=10'
-        ]
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        if getattr(self.local, 'buffer', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def run_concurrently(tasks):
+    """Run (name, callable) tasks in parallel
+
+    Each task's output is held back and printed in one piece as soon as that
+    task finishes, so concurrent tasks don't interleave their lines.
+    """
+    output = _ThreadOutput(sys.stdout)
+
+    def run(task):
+        output.local.buffer = io.StringIO()
+        try:
+            task()
+        except Exception as e:
+            print(colored(f"❌ Error: {str(e)}", "red"))
+        finally:
+            text = output.local.buffer.getvalue()
+            output.local.buffer = None
+        return text
 
-        # Use SSH key if no password provided
-        if not self.vps_password:
-            ssh_key_path = os.path.expanduser('~/.ssh/qfield_vps')
-            if os.path.exists(ssh_key_path):
-                ssh_options.extend(['-i', ssh_key_path])
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = {executor.submit(run, task): name for name, task in tasks}
+            for future in as_completed(futures):
+                output.stream.write(future.result())
+                print(colored(f"✅ {futures[future]} finished", "cyan"), flush=True)
+    finally:
+        sys.stdout = output.stream
+
+class QFieldCleanup(SSHBase):
+    def __init__(self):
+        super().__init__()
+        self._psql_process = None
 
-        ssh_cmd.extend(ssh_options)
+    def execute_ssh_command(self, command, timeout=30):
+        """Execute command on VPS via SSH"""
+        return self._run_ssh(self.build_ssh_command(command), None, timeout)
 
-        if self.vps_password:
-            ssh_cmd = ['sshpass', '-p', self.vps_password] + ssh_cmd
-            ssh_cmd.extend(['-o', 'PubkeyAuthentication=no'])
+    def execute_ssh_script(self, script, timeout=30):
+        """Run a multi-command bash script on the VPS in a single SSH session
 
-        ssh_cmd.append(f'{self.vps_user}@{self.vps_host}')
-        ssh_cmd.append(command)
+        The script is fed to 'bash -s' on stdin, so no quoting is needed.
+        """
+        return self._run_ssh(self.build_ssh_command('bash -s'), script, timeout)
 
+    def _run_ssh(self, ssh_cmd, script, timeout):
+        """Run an ssh argv, returning stdout or None on failure"""
+        # Show everything printed so far before waiting on the VPS
+        sys.stdout.flush()
         try:
             result = subprocess.run(
                 ssh_cmd,
+                input=script,
                 capture_output=True,
                 text=True,
                 timeout=timeout
@@ -87,37 +217,160 @@ class QFieldCleanup:
             print(colored(f"Error: {str(e)}", "red"))
             return None
 
+    def execute_ssh_command_streaming(self, command, timeout=600):
+        """Run a long command or script on the VPS, yielding output lines as they arrive
+
+        The command is fed to 'bash -s' on stdin and stderr is merged into the
+        output, so progress and errors show up while the command is running.
+        """
+        ssh_cmd = self.build_ssh_command('bash -s')
+        try:
+            process = subprocess.Popen(
+                ssh_cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1
+            )
+        except Exception as e:
+            print(colored(f"Error: {str(e)}", "red"))
+            return
+
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, expire)
+        timer.start()
+        try:
+            process.stdin.write(command)
+            process.stdin.close()
+            while True:
+                # Flush what the caller printed before blocking on the next line
+                sys.stdout.flush()
+                line = process.stdout.readline()
+                if not line:
+                    break
+                yield line.rstrip('\n')
+            process.wait()
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if timed_out.is_set():
+            print(colored("Command timed out", "yellow"))
+
+    @property
+    def _psql(self):
+        """psql session on the VPS, started on first use and after it exits"""
+        if self._psql_process is None or self._psql_process.poll() is not None:
+            self._psql_process = subprocess.Popen(
+                self.build_ssh_command(PSQL_COMMAND),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1
+            )
+        return self._psql_process
+
+    def psql_query(self, sql, timeout=600):
+        """Run SQL in the persistent psql session, returning its output or None
+
+        Saves a docker exec, psql start-up and database connection per query.
+        """
+        sys.stdout.flush()
+        try:
+            psql = self._psql
+            psql.stdin.write(f"{sql}\n\\echo {PSQL_SENTINEL}\n")
+            psql.stdin.flush()
+        except Exception as e:
+            print(colored(f"Error: {str(e)}", "red"))
+            return None
+
+        # A hung query kills the session; the next query starts a new one
+        timer = threading.Timer(timeout, psql.kill)
+        timer.start()
+        lines = []
+        try:
+            while True:
+                line = psql.stdout.readline()
+                if not line:
+                    break
+                line = line.rstrip('\n')
+                if line == PSQL_SENTINEL:
+                    return '\n'.join(lines)
+                lines.append(line)
+        finally:
+            timer.cancel()
+
+        print(colored("psql session ended unexpectedly", "yellow"))
+        return None
+
+    def close(self):
+        """End the psql session, if one was started"""
+        if self._psql_process and self._psql_process.poll() is None:
+            self._psql_process.stdin.close()
+            try:
+                self._psql_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._psql_process.kill()
+
     def check_disk_space(self):
         """Check current disk usage"""
         print(colored("\n📊 Current Disk Usage", "cyan", bold=True))
         print("=" * 60)
 
+        # All probes in one SSH session, sections separated by '---'
+        script = f"""python3 -c '{DISK_USAGE_PY}' / /var/lib/docker
+echo ---
+docker system df
+"""
+        result = self.execute_ssh_script(script)
+        sections = result.split('---\n') if result else []
+        disk, docker_df = (sections + ['', ''])[:2]
+
+        try:
+            usage = json.loads(disk) if disk.strip() else {}
+        except ValueError:
+            usage = {}
+
         # Check main disk
-        cmd = "df -h / | awk 'NR==2 {print $2,$3,$4,$5}'"
-        result = self.execute_ssh_command(cmd)
-        if result:
-            parts = result.strip().split()
-            if len(parts) == 4:
-                total, used, free, percent = parts
-                print(f"Total: {total}, Used: {used}, Free: {free}, Usage: {percent}")
-
-                usage_int = int(percent.replace('%', ''))
-                if usage_int >= 85:
-                    print(colored(f"❌ CRITICAL: Disk usage at {percent}", "red"))
-                elif usage_int >= 70:
-                    print(colored(f"⚠️  WARNING: Disk usage at {percent}", "yellow"))
-                else:
-                    print(colored(f"✅ OK: Disk usage at {percent}", "green"))
+        if '/' in usage:
+            total, used, free, percent = self._describe_usage(usage['/'])
+            print(f"Total: {total}, Used: {used}, Free: {free}, Usage: {percent}%")
+
+            if percent >= 85:
+                print(colored(f"❌ CRITICAL: Disk usage at {percent}%", "red"))
+            elif percent >= 70:
+                print(colored(f"⚠️  WARNING: Disk usage at {percent}%", "yellow"))
+            else:
+                print(colored(f"✅ OK: Disk usage at {percent}%", "green"))
 
         # Check Docker space
         print(colored("\n🐳 Docker Disk Usage", "cyan"))
-        cmd = "docker system df"
-        result = self.execute_ssh_command(cmd)
-        if result:
-            print(result)
+        if docker_df:
+            print(docker_df)
+
+        if '/var/lib/docker' in usage:
+            total, used, free, percent = self._describe_usage(usage['/var/lib/docker'])
+            print(f"/var/lib/docker - Total: {total}, Used: {used}, Free: {free}, Usage: {percent}%")
 
         return True
 
+    @staticmethod
+    def _describe_usage(sizes):
+        """Formatted (total, used, free, percent) from raw statvfs byte counts"""
+        total, used, free = sizes
+        # Same rounding as df: used share of the space available to users, rounded up
+        percent = -(-used * 100 // (used + free)) if used + free else 0
+        return format_size(total), format_size(used), format_size(free), percent
+
     def clean_docker_system(self, dry_run=False):
         """Clean Docker system artifacts"""
         print(colored("\n🧹 Docker System Cleanup", "cyan", bold=True))
@@ -128,21 +381,31 @@ class QFieldCleanup:
             cmd = "docker system df"
         else:
             print("Removing unused Docker objects...")
-            # This command removes:
-            # - All stopped containers
-            # - All networks not used by at least one container
-            # - All dangling images
-            # - All dangling build cache
-            cmd = "docker system prune -af --volumes"
-
-        result = self.execute_ssh_command(cmd, timeout=120)
-        if result:
-            print(result)
-            if not dry_run and "Total reclaimed space" in result:
-                # Extract reclaimed space
-                for line in result.split('\n'):
-                    if "Total reclaimed space" in line:
-                        print(colored(f"✅ {line}", "green", bold=True))
+            # Prune objects unused for a week first and only move on to newer
+            # ones while the disk is still above target. Each step removes:
+            # - Stopped containers
+            # - Networks not used by at least one container
+            # - Unused images
+            # - Build cache
+            # Volumes are left alone - volume prune has no 'until' filter.
+            cmd = f"""for age in {' '.join(DOCKER_PRUNE_AGES)}; do
+    echo "Pruning objects unused for $age..."
+    docker container prune -f --filter "until=$age"
+    docker network prune -f --filter "until=$age"
+    docker image prune -af --filter "until=$age"
+    docker builder prune -af --filter "until=$age"
+    usage=$(df --output=pcent /var/lib/docker | tail -1 | tr -dc 0-9)
+    echo "Disk usage now $usage%"
+    if [ "$usage" -lt {DOCKER_PRUNE_TARGET} ]; then break; fi
+done
+"""
+
+        # Pruning can take minutes - show its progress as it happens
+        for line in self.execute_ssh_command_streaming(cmd):
+            if "Total reclaimed space" in line:
+                print(colored(f"✅ {line}", "green", bold=True))
+            else:
+                print(line)
 
         return True
 
@@ -151,36 +414,51 @@ class QFieldCleanup:
         print(colored("\n📄 Log File Cleanup", "cyan", bold=True))
         print("=" * 60)
 
-        # Find large log files first
-        print("Finding large log files (>100MB)...")
-        cmd = "find /var/log -type f -name '*.log' -size +100M 2>/dev/null | head -10"
-        large_files = self.execute_ssh_command(cmd)
-        if large_files:
-            print("Large log files found:")
-            for file in large_files.strip().split('\n'):
-                if file:
-                    # Get file size
-                    size_cmd = f"ls -lh {file} 2>/dev/null | awk '{{print $5}}'"
-                    size = self.execute_ssh_command(size_cmd)
-                    if size:
-                        print(f"  {file}: {size.strip()}")
-
+        # Discovery and every removal step run as one script over a single SSH
+        # session. Each step starts with an '@@<step>' marker line; the large
+        # file listing carries sizes and the removal steps report a count.
+        script = """echo @@large
+find /var/log -type f -name '*.log' -size +100M -printf '%s\\t%p\\n' 2>/dev/null | sort -rn | head -10
+"""
         if not dry_run:
-            # Clean old logs (>30 days)
-            print("\nRemoving logs older than 30 days...")
-            cmd = "find /var/log -type f -name '*.log' -mtime +30 -delete 2>/dev/null"
-            self.execute_ssh_command(cmd)
-
-            # Truncate Docker container logs
-            print("Truncating Docker container logs...")
-            cmd = "truncate -s 0 /var/lib/docker/containers/*/*-json.log 2>/dev/null"
-            self.execute_ssh_command(cmd)
+            script += """echo @@old
+find /var/log -type f -name '*.log' -mtime +30 -delete -print 2>/dev/null | wc -l
+echo @@docker
+set -- /var/lib/docker/containers/*/*-json.log
+if [ -e "$1" ]; then truncate -s 0 "$@" 2>/dev/null; echo $#; else echo 0; fi
+echo @@qfield
+find /opt/qfieldcloud/logs -maxdepth 1 -type f -name '*.log.*' -print0 2>/dev/null | xargs -0 -r -n 200 -P 8 rm -fv | wc -l
+"""
 
-            # Clean QFieldCloud specific logs
-            print("Cleaning QFieldCloud logs...")
-            cmd = "rm -rf /opt/qfieldcloud/logs/*.log.* 2>/dev/null"
-            self.execute_ssh_command(cmd)
+        steps = {
+            '@@large': "Finding large log files (>100MB)...",
+            '@@old': "\nRemoving logs older than 30 days...",
+            '@@docker': "Truncating Docker container logs...",
+            '@@qfield': "Cleaning QFieldCloud logs..."
+        }
+        counts = {
+            '@@old': "  Removed {} old log files",
+            '@@docker': "  Truncated {} container logs",
+            '@@qfield': "  Removed {} QFieldCloud log files"
+        }
+
+        step = None
+        large_found = False
+        for line in self.execute_ssh_command_streaming(script, timeout=1800):
+            if line in steps:
+                step = line
+                print(steps[step])
+            elif step == '@@large':
+                size, _, path = line.partition('\t')
+                if path and size.isdigit():
+                    if not large_found:
+                        print("Large log files found:")
+                        large_found = True
+                    print(f"  {path}: {format_size(int(size))}")
+            elif step in counts and line.strip().isdigit():
+                print(counts[step].format(line.strip()))
 
+        if not dry_run:
             print(colored("✅ Log cleanup completed", "green"))
         else:
             print(colored("DRY RUN - No logs removed", "yellow"))
@@ -192,35 +470,46 @@ class QFieldCleanup:
         print(colored("\n🗄️ Database Job Cleanup", "cyan", bold=True))
         print("=" * 60)
 
-        # Check current job statistics
+        # Stats and the delete share one psql session: one docker exec, and
+        # the delete acts on the counts it reported
         print("Checking job statistics...")
-        stats_cmd = """docker exec qfieldcloud-db-1 psql -U qfieldcloud_db_admin -d qfieldcloud_db -t -c "
-            SELECT
-                COUNT(*) as total_jobs,
-                COUNT(CASE WHEN created_at < NOW() - INTERVAL '30 days' THEN 1 END) as old_jobs,
-                COUNT(CASE WHEN status IN ('pending','queued') AND created_at < NOW() - INTERVAL '1 day' THEN 1 END) as stuck_jobs
-            FROM core_job;" 2>/dev/null"""
-
-        result = self.execute_ssh_command(stats_cmd)
-        if result:
-            parts = result.strip().split('|')
-            if len(parts) >= 3:
-                total = parts[0].strip()
-                old = parts[1].strip()
-                stuck = parts[2].strip()
-                print(f"Total jobs: {total}")
-                print(f"Jobs >30 days old: {old}")
-                print(f"Stuck jobs >24h: {stuck}")
-
-                if not dry_run and int(old) > 0:
-                    print(f"\nDeleting {old} old job records...")
-                    delete_cmd = """docker exec qfieldcloud-db-1 psql -U qfieldcloud_db_admin -d qfieldcloud_db -c "
-                        DELETE FROM core_job WHERE created_at < NOW() - INTERVAL '30 days';" 2>/dev/null"""
-                    result = self.execute_ssh_command(delete_cmd)
-                    if result and "DELETE" in result:
-                        print(colored(f"✅ Deleted {old} old job records", "green"))
-                elif dry_run:
-                    print(colored(f"DRY RUN - Would delete {old} old job records", "yellow"))
+        if dry_run:
+            sql = JOB_STATS_SQL.format(fail_stuck='', failed_jobs='0')
+        else:
+            sql = JOB_STATS_SQL.format(fail_stuck=JOB_FAIL_STUCK_CTE,
+                                       failed_jobs='(SELECT COUNT(*) FROM failed)') + JOB_DELETE_SQL
+        result = self.psql_query(sql)
+
+        stats = deleted = None
+        errors = []
+        for line in (result or '').splitlines():
+            if line.startswith('STATS '):
+                stats = line.split()[1:]
+            elif 'DELETED' in line:
+                deleted = line.rsplit(None, 1)[-1]
+            elif 'ERROR' in line:
+                errors.append(line)
+
+        if not stats or errors:
+            print(colored("❌ Job cleanup query failed", "red"))
+            for line in errors:
+                print(f"  {line}")
+
+        if not errors and stats and len(stats) == 4 and all(s.isdigit() for s in stats):
+            total, old, stuck, failed = stats
+            print(f"Total jobs: {total}")
+            print(f"Jobs >30 days old: {old}")
+            print(f"Stuck jobs >24h: {stuck}")
+
+            if int(failed) > 0:
+                print(colored(f"✅ Marked {failed} stuck jobs as failed", "green"))
+            elif dry_run and int(stuck) > 0:
+                print(colored(f"DRY RUN - Would mark {min(int(stuck), STUCK_JOB_LIMIT)} stuck jobs as failed", "yellow"))
+
+            if deleted is not None:
+                print(colored(f"✅ Deleted {deleted} old job records (batches of {JOB_DELETE_BATCH})", "green"))
+            elif dry_run and int(old) > 0:
+                print(colored(f"DRY RUN - Would delete {old} old job records", "yellow"))
 
         return True
 
@@ -231,10 +520,6 @@ class QFieldCleanup:
 
         backup_dir = f"/root/qfield_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-        # Create backup directory
-        cmd = f"mkdir -p {backup_dir}"
-        self.execute_ssh_command(cmd)
-
         # Backup important files
         files_to_backup = [
             "/opt/qfieldcloud/.env",
@@ -244,19 +529,26 @@ class QFieldCleanup:
 
         for file in files_to_backup:
             print(f"Backing up {file}...")
-            cmd = f"cp {file} {backup_dir}/ 2>/dev/null"
-            self.execute_ssh_command(cmd)
 
         # Save current status
         print("Saving current status...")
-        status_cmd = f"""cat > {backup_dir}/status.txt << 'EOF'
+        db_size = self.psql_query(
+            "SELECT 'DB Size: ' || pg_size_pretty(pg_database_size('qfieldcloud_db'));"
+        ) or ''
+
+        # Directory, file copies (one cp for all files) and status in one session
+        files_list = ' '.join(shlex.quote(f) for f in files_to_backup)
+        script = f"""mkdir -p {shlex.quote(backup_dir)}
+cp -t {shlex.quote(backup_dir)} {files_list} 2>/dev/null || true
+cat > {shlex.quote(backup_dir)}/status.txt << EOF
 Migration Preparation Date: {datetime.now()}
 Server: 72.61.166.168
 $(docker ps | wc -l) containers running
 $(df -h / | awk 'NR==2 {{print "Disk: " $5 " used"}}')
-$(docker exec qfieldcloud-db-1 psql -U qfieldcloud_db_admin -d qfieldcloud_db -t -c "SELECT 'DB Size: ' || pg_size_pretty(pg_database_size('qfieldcloud_db'));" 2>/dev/null)
-EOF"""
-        self.execute_ssh_command(status_cmd)
+{db_size}
+EOF
+"""
+        self.execute_ssh_script(script)
 
         print(colored(f"✅ Configuration backed up to {backup_dir}", "green"))
         return backup_dir
@@ -276,9 +568,14 @@ def main():
                        help='Skip database job cleanup')
     parser.add_argument('--skip-backup', action='store_true',
                        help='Skip configuration backup')
+    parser.add_argument('--parallel', action=argparse.BooleanOptionalAction, default=False,
+                       help='Run backup, Docker and log cleanup concurrently (output is shown per task)')
 
     args = parser.parse_args()
 
+    # Block-buffer output; it is flushed whenever we wait on the VPS
+    sys.stdout.reconfigure(line_buffering=False)
+
     # Initialize cleanup instance
     cleanup = QFieldCleanup()
 
@@ -289,17 +586,27 @@ def main():
         # Show current status
         cleanup.check_disk_space()
 
+        # Backup, Docker and log cleanup touch separate parts of the server
+        tasks = []
+
         # Backup configuration first
         if not args.skip_backup and not args.dry_run:
-            backup_dir = cleanup.backup_configuration()
+            tasks.append(("Configuration backup", cleanup.backup_configuration))
 
         # Run cleanup tasks
         if not args.skip_docker:
-            cleanup.clean_docker_system(args.dry_run)
+            tasks.append(("Docker cleanup", lambda: cleanup.clean_docker_system(args.dry_run)))
 
         if not args.skip_logs:
-            cleanup.clean_old_logs(args.dry_run)
+            tasks.append(("Log cleanup", lambda: cleanup.clean_old_logs(args.dry_run)))
+
+        if args.parallel and len(tasks) > 1:
+            run_concurrently(tasks)
+        else:
+            for _, task in tasks:
+                task()
 
+        # Job cleanup stays last: the database container must be settled
         if not args.skip_jobs:
             cleanup.clean_old_jobs(args.dry_run)
 
@@ -321,9 +628,11 @@ def main():
             print("\nFull migration plan: MIGRATION_PLAN.md")
 
     except Exception as e:
-        print(colored(f"❌ Error during cleanup: {str(e)}", "red"))
+        print(colored(f"❌ Error during cleanup: {str(e)}", "red"), flush=True)
         import traceback
         traceback.print_exc()
+    finally:
+        cleanup.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
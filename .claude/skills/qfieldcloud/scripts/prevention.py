@@ -5,17 +5,81 @@ Interact with the self-healing prevention system
 """
 
 import os
+import re
 import sys
 import json
+import shlex
 import argparse
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
 
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
+from ssh_base import SSH_MUX_OPTIONS
+
+MONITOR_LOG = '/var/log/qfield_monitor.log'
+
+# Monitor log lines reported under "Recent Interventions"
+_INTERVENTION_RE = re.compile(rb'restarting|intervention', re.IGNORECASE)
+
+def _tail_local(path, n=1, pattern=None):
+    """Last n lines of a local file, optionally only those matching pattern
+
+    The file is read backwards in blocks from the end, so only as much of it
+    as needed is read. Returns [] if the file can't be opened.
+    """
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return []
+
+    lines = []
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        partial = b''
+        while pos > 0 and len(lines) < n:
+            step = min(pos, 8192)
+            pos -= step
+            f.seek(pos)
+            parts = (f.read(step) + partial).split(b'\n')
+            # The first piece may continue in the previous block
+            partial = parts.pop(0)
+            for line in reversed(parts):
+                if line and (pattern is None or pattern.search(line)):
+                    lines.append(line)
+                    if len(lines) == n:
+                        break
+        if len(lines) < n and partial and (pattern is None or pattern.search(partial)):
+            lines.append(partial)
+
+    return [line.decode(errors='replace') for line in reversed(lines)]
+
+# check_status layout; each field is filled in by the matching _probe_* method
+STATUS_REPORT = """🛡️  Prevention System Status
+{sep}
+
+📡 Monitor Daemon:
+{monitor}
+
+⏰ Cron Jobs:
+{cron}
+
+💾 VPS Disk Space:
+{disk}
+
+⚙️  Worker Containers:
+{workers}
+
+🔧 Recent Interventions:
+{interventions}
+
+{sep}"""
+
 class PreventionSystemManager:
     def __init__(self):
         self.vps_host = os.getenv('QFIELDCLOUD_VPS_HOST', '72.61.166.168')
@@ -31,6 +95,7 @@ class PreventionSystemManager:
             '-i', self.ssh_key,
             '-o', 'StrictHostKeyChecking=no',
             '-o', 'ConnectTimeout=10',
+            *SSH_MUX_OPTIONS,
             f'{self.vps_user}@{self.vps_host}',
             command
         ]
@@ -53,12 +118,43 @@ class PreventionSystemManager:
         except Exception as e:
             return False, "", str(e)
 
-    def execute_local_command(self, command, show_output=False):
-        """Execute command locally"""
+    @cached_property
+    def crontab(self):
+        """Installed crontab text, read once per run (None if there is none)"""
+        success, stdout, _ = self.execute_local_command("crontab -l")
+        return stdout if success else None
+
+    @cached_property
+    def cron_entries(self):
+        """(schedule, command) pairs parsed from the crontab"""
+        entries = []
+        for line in (self.crontab or '').splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('@'):
+                fields = line.split(None, 1)
+            else:
+                fields = line.split(None, 5)
+                if len(fields) < 6:
+                    # Environment assignments and malformed lines
+                    continue
+            entries.append((' '.join(fields[:-1]), fields[-1]))
+        return entries
+
+    def execute_local_command(self, command, show_output=False, cwd=None):
+        """Execute command locally
+
+        command is an argv list or a plain string split with shlex - it is
+        not run through a shell, so pipes and redirects are not supported.
+        """
+        if isinstance(command, str):
+            command = shlex.split(command)
+
         try:
             result = subprocess.run(
                 command,
-                shell=True,
+                cwd=cwd,
                 capture_output=True,
                 text=True,
                 timeout=30
@@ -74,49 +170,54 @@ class PreventionSystemManager:
 
     def check_status(self):
         """Check prevention system status"""
-        print("🛡️  Prevention System Status")
-        print("=" * 70)
+        probes = {
+            'monitor': self._probe_monitor,
+            'cron': self._probe_cron,
+            'disk': self._probe_disk,
+            'workers': self._probe_workers,
+            'interventions': self._probe_interventions
+        }
+
+        # Probes are independent, so run them together, then render the
+        # report in one write
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            futures = {name: executor.submit(probe) for name, probe in probes.items()}
+
+        results = {name: future.result() for name, future in futures.items()}
+        print(STATUS_REPORT.format(sep="=" * 70, **results))
 
-        # 1. Monitor Daemon
-        print("\n📡 Monitor Daemon:")
+    def _probe_monitor(self):
+        """Monitor daemon state and last check time"""
         success, stdout, stderr = self.execute_local_command(
             "systemctl is-active qfield-monitor"
         )
 
-        if success and stdout.strip() == "active":
-            print("   ✅ Running")
+        if not (success and stdout.strip() == "active"):
+            return "   ❌ Not running"
 
-            # Get last check time
-            success, stdout, _ = self.execute_local_command(
-                "tail -1 /var/log/qfield_monitor.log 2>/dev/null"
-            )
-            if success and stdout:
-                try:
-                    # Extract timestamp from log line
-                    timestamp = stdout.split(' - ')[0]
-                    print(f"   Last check: {timestamp}")
-                except:
-                    pass
-        else:
-            print("   ❌ Not running")
+        lines = ["   ✅ Running"]
 
-        # 2. Cron Jobs
-        print("\n⏰ Cron Jobs:")
-        success, stdout, _ = self.execute_local_command(
-            "crontab -l 2>/dev/null | grep -c qfield"
-        )
+        # Get last check time
+        last = _tail_local(MONITOR_LOG)
+        if last:
+            # Extract timestamp from log line
+            timestamp = last[0].split(' - ')[0]
+            lines.append(f"   Last check: {timestamp}")
 
-        if success:
-            count = stdout.strip()
-            if count == "5":
-                print(f"   ✅ All installed ({count}/5)")
-            else:
-                print(f"   ⚠️  Incomplete ({count}/5 installed)")
-        else:
-            print("   ❌ Not installed (0/5)")
+        return "\n".join(lines)
+
+    def _probe_cron(self):
+        """Number of installed qfield cron jobs"""
+        count = sum(1 for line in (self.crontab or '').splitlines() if 'qfield' in line)
 
-        # 3. Disk Space
-        print("\n💾 VPS Disk Space:")
+        if count == 5:
+            return f"   ✅ All installed ({count}/5)"
+        if count:
+            return f"   ⚠️  Incomplete ({count}/5 installed)"
+        return "   ❌ Not installed (0/5)"
+
+    def _probe_disk(self):
+        """Docker volume usage on the VPS"""
         success, stdout, _ = self.execute_ssh_command(
             "df -h /var/lib/docker | tail -1"
         )
@@ -137,37 +238,49 @@ class PreventionSystemManager:
                 else:
                     status = "❌"
 
-                print(f"   {status} Used: {used} / {size} ({percent})")
-                print(f"   Available: {avail}")
+                return f"   {status} Used: {used} / {size} ({percent})\n   Available: {avail}"
+
+        return "   ❌ Could not read disk usage"
 
-        # 4. Worker Status
-        print("\n⚙️  Worker Containers:")
+    def _probe_workers(self):
+        """Number of worker containers"""
         success, stdout, _ = self.execute_ssh_command(
             f"cd {self.project_path} && docker compose ps worker_wrapper --format json 2>/dev/null"
         )
 
-        if success and stdout:
-            worker_count = len([line for line in stdout.strip().split('\n') if line])
-            if worker_count >= 2:
-                print(f"   ✅ {worker_count} workers running")
+        if not (success and stdout.strip()):
+            return "   ❌ No workers detected"
+
+        # One JSON object per line; older compose versions print a single array
+        try:
+            if stdout.lstrip().startswith('['):
+                workers = json.loads(stdout)
             else:
-                print(f"   ⚠️  Only {worker_count} workers (expected 2)")
-        else:
-            print("   ❌ No workers detected")
+                workers = [json.loads(line) for line in stdout.splitlines() if line.strip()]
+        except json.JSONDecodeError:
+            return "   ⚠️  Could not parse worker status"
 
-        # 5. Recent Interventions
-        print("\n🔧 Recent Interventions:")
-        success, stdout, _ = self.execute_local_command(
-            "grep -i 'restarting\\|intervention' /var/log/qfield_monitor.log 2>/dev/null | tail -3"
-        )
+        running = sum(1 for w in workers if w.get('State') == 'running')
+        unhealthy = sum(1 for w in workers if w.get('Health') == 'unhealthy')
 
-        if success and stdout.strip():
-            for line in stdout.strip().split('\n'):
-                print(f"   • {line[:100]}")
+        if running >= 2:
+            line = f"   ✅ {running}/{len(workers)} workers running"
+        elif running:
+            line = f"   ⚠️  Only {running}/{len(workers)} workers running (expected 2)"
         else:
-            print("   ✅ None (all healthy)")
+            return f"   ❌ No workers running ({len(workers)} containers)"
 
-        print("\n" + "=" * 70)
+        if unhealthy:
+            line += f"\n   ⚠️  {unhealthy} unhealthy"
+        return line
+
+    def _probe_interventions(self):
+        """Last few restarts/interventions from the monitor log"""
+        interventions = _tail_local(MONITOR_LOG, 3, _INTERVENTION_RE)
+
+        if interventions:
+            return "\n".join(f"   • {line[:100]}" for line in interventions)
+        return "   ✅ None (all healthy)"
 
     def view_monitor_logs(self, lines=50, follow=False):
         """View monitor daemon logs"""
@@ -175,12 +288,12 @@ class PreventionSystemManager:
         print("=" * 70)
 
         if follow:
-            cmd = "tail -f /var/log/qfield_monitor.log"
-            print("Following logs (Ctrl+C to exit)...\n")
+            print("Following logs (Ctrl+C to exit)...\n", flush=True)
+            # tail writes straight to the terminal so lines show up as they arrive
+            subprocess.run(['tail', '-f', MONITOR_LOG])
         else:
-            cmd = f"tail -{lines} /var/log/qfield_monitor.log 2>/dev/null"
-
-        self.execute_local_command(cmd, show_output=True)
+            for line in _tail_local(MONITOR_LOG, lines):
+                print(line)
 
     def control_monitor(self, action):
         """Control monitor daemon"""
@@ -235,8 +348,8 @@ class PreventionSystemManager:
             print(f"🔧 Running: {script_name}")
             print("=" * 70)
 
-            cmd = f"cd {self.local_qfield_path} && ./{script_name}"
-            self.execute_local_command(cmd, show_output=True)
+            self.execute_local_command([f"./{script_name}"], show_output=True,
+                                       cwd=self.local_qfield_path)
         else:
             # Run all quick maintenance
             print("🔧 Running Quick Maintenance")
@@ -248,8 +361,8 @@ class PreventionSystemManager:
 
                 if os.path.exists(script_path):
                     print(f"\n▶ {script_name}:")
-                    cmd = f"cd {self.local_qfield_path} && ./{script_name}"
-                    self.execute_local_command(cmd, show_output=True)
+                    self.execute_local_command([f"./{script_name}"], show_output=True,
+                                               cwd=self.local_qfield_path)
 
     def view_stats(self):
         """View usage statistics"""
@@ -308,22 +421,23 @@ class PreventionSystemManager:
             ('0 6 * * *', 'qfield_stats.sh', 'Usage statistics')
         ]
 
-        success, stdout, _ = self.execute_local_command("crontab -l 2>/dev/null")
-
-        if not success:
+        if self.crontab is None:
             print("❌ No crontab found")
             return
 
-        installed = stdout
-
         for schedule, script, description in expected_jobs:
-            if script in installed:
+            installed = [sched for sched, command in self.cron_entries if script in command]
+            if not installed:
+                print(f"❌ {description}")
+                print(f"   Missing: {script}")
+            elif schedule in installed:
                 print(f"✅ {description}")
                 print(f"   Schedule: {schedule}")
                 print(f"   Script: {script}")
             else:
-                print(f"❌ {description}")
-                print(f"   Missing: {script}")
+                print(f"⚠️  {description}")
+                print(f"   Schedule: {', '.join(installed)} (expected {schedule})")
+                print(f"   Script: {script}")
             print()
 
         print("=" * 70)
@@ -5,23 +5,176 @@ Check the status of QFieldCloud Docker services and health
 """
 
 import os
+import re
 import sys
 import json
+import time
+import ssl
+import socket
 import argparse
-import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+import requests
+
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
-class QFieldCloudMonitor:
+from ssh_base import SSHBase
+
+# Incremental decoding of docker's JSON output
+_JSON_DECODER = json.JSONDecoder()
+_WHITESPACE_RE = re.compile(r'\s*')
+
+# Sentinel line that starts each section of a batched SSH call
+_SECTION_RE = re.compile(r'^===__(\w+)__===$\n?', re.MULTILINE)
+
+# Public endpoints (and the TLS certificate) are probed directly from this host, not over SSH
+API_HOST = 'qfield.fibreflow.app'
+API_BASE_URL = f'https://{API_HOST}'
+
+# Warn when the certificate expires within this many seconds (7 days)
+CERT_WARN_SECONDS = 7 * 24 * 3600
+
+# (key, path, display name) probed by check_api_health
+API_ENDPOINTS = [
+    ('status', '/api/v1/status/', 'API Status'),
+    ('swagger', '/swagger/', 'API Documentation'),
+    ('admin', '/admin/', 'Admin Interface'),
+    ('root', '/', 'Web Interface')
+]
+
+# Services whose logs are scanned by check_recent_errors
+ERROR_LOG_SERVICES = ['app', 'nginx', 'worker_wrapper']
+
+def _parse_logs(output, keep=5):
+    """Count matched log lines and keep the last few (replaces a remote tail)"""
+    recent = deque(maxlen=keep)
+    count = 0
+    for line in output.splitlines():
+        if line.strip():
+            recent.append(line)
+            count += 1
+    return count, list(recent)
+
+
+def iter_containers(output):
+    """Yield container dicts from compose ps JSON (one object per line, or one array)
+
+    Decodes in place with raw_decode so callers can stop early; lines that
+    aren't JSON (compose errors/warnings) are skipped.
+    """
+    pos, end = 0, len(output)
+    while True:
+        pos = _WHITESPACE_RE.match(output, pos).end()
+        if pos >= end:
+            return
+        try:
+            data, pos = _JSON_DECODER.raw_decode(output, pos)
+        except ValueError:
+            pos = output.find('\n', pos)
+            if pos < 0:
+                return
+            continue
+        for container in data if isinstance(data, list) else [data]:
+            if isinstance(container, dict):
+                yield container
+
+
+def _cpu_usage(output):
+    """CPU busy % between two 'cpu' lines of /proc/stat, or None"""
+    samples = [
+        [int(value) for value in line.split()[1:9]]
+        for line in output.splitlines() if line.startswith('cpu ')
+    ]
+    if len(samples) != 2:
+        return None
+
+    # idle + iowait count as idle time
+    first, second = samples
+    total = sum(second) - sum(first)
+    idle = (second[3] + second[4]) - (first[3] + first[4])
+    return 100 * (total - idle) / total if total > 0 else 0.0
+
+
+def _format_size(num_bytes):
+    """Human-readable size in the style of df -h / free -h"""
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if num_bytes < 1024 or unit == 'T':
+            break
+        num_bytes /= 1024
+    return f"{num_bytes:.0f}{unit}" if unit == 'B' else f"{num_bytes:.1f}{unit}"
+
+
+# get_status() results are reused for this many seconds
+STATUS_CACHE_TTL = 30
+
+
+def _cache_dir():
+    """Per-user directory for the status cache (created 0700 on first save)"""
+    base = os.getenv('XDG_RUNTIME_DIR') or os.path.expanduser('~/.cache')
+    return Path(base) / 'qfieldcloud'
+
+
+class StatusCache:
+    """get_status() result cached on disk per VPS host, shared between runs
+
+    remediate.py acts on this status, so the file lives in a private per-user
+    directory and is only trusted if this user owns it.
+    """
+
+    def __init__(self, host, ttl=STATUS_CACHE_TTL):
+        self.path = _cache_dir() / f'status-{host}.json'
+        self.ttl = ttl
+
+    def load(self):
+        """Return the cached status, or None if missing, foreign or older than the TTL"""
+        try:
+            st = self.path.stat()
+            if st.st_uid == os.getuid() and time.time() - st.st_mtime < self.ttl:
+                status = json.loads(self.path.read_text())
+                if not status.get('error'):
+                    return status
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def save(self, status):
+        """Store status, replacing the file atomically
+
+        Failed diagnostics (a status with 'error') are never stored, so later
+        runs probe again instead of acting on them.
+        """
+        if status.get('error'):
+            return
+        try:
+            self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(status, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+
+    def invalidate(self):
+        """Drop the cached status (e.g. after a fix changed the server)"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class QFieldCloudMonitor(SSHBase):
     def __init__(self):
-        self.vps_host = os.getenv('QFIELDCLOUD_VPS_HOST', '72.61.166.168')
-        self.vps_user = os.getenv('QFIELDCLOUD_VPS_USER', 'root')
-        self.vps_password = os.getenv('QFIELDCLOUD_VPS_PASSWORD')
-        self.project_path = os.getenv('QFIELDCLOUD_PROJECT_PATH', '/opt/qfieldcloud')
+        super().__init__()
 
         # Docker services to monitor
         self.services = [
@@ -33,262 +186,328 @@ class QFieldCloudMonitor:
             'minio',
             'ofelia'
         ]
+        self._service_set = set(self.services)
+        self._cache = StatusCache(self.vps_host)
 
-    def execute_ssh_command(self, command, show_output=False):
+    def execute_ssh_command(self, command, show_output=False, timeout=30):
         """Execute command on VPS via SSH"""
-        ssh_cmd = ['ssh']
-
-        ssh_options = [
-            '-o', 'StrictHostKeyChecking=no',
-            '-o', 'ConnectTimeout=10'
-        ]
-
-        # Use SSH key if no password provided
-        if not self.vps_password:
-            ssh_key_path = os.path.expanduser('~/.ssh/qfield_vps')
-            if os.path.exists(ssh_key_path):
-                ssh_options.extend(['-i', ssh_key_path])
-
-        ssh_cmd.extend(ssh_options)
-
-        if self.vps_password:
-            ssh_cmd = ['sshpass', '-p', self.vps_password] + ssh_cmd
-            ssh_cmd.extend(['-o', 'PubkeyAuthentication=no'])
-
-        ssh_cmd.append(f'{self.vps_user}@{self.vps_host}')
-        ssh_cmd.append(command)
-
-        try:
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if show_output and result.stdout:
-                print(result.stdout)
-
-            return result.returncode == 0, result.stdout
-
-        except subprocess.TimeoutExpired:
-            return False, "Command timed out"
-        except Exception as e:
-            return False, str(e)
-
-    def check_docker_services(self):
+        success, stdout, _ = self.execute(command, timeout)
+
+        if show_output and stdout:
+            print(stdout)
+
+        return success, stdout
+
+    def execute_ssh_batch(self, commands, timeout=90):
+        """Run several commands concurrently in one SSH call
+
+        Returns (success, {key: output}). On an SSH failure or timeout every
+        output is '' and success is False, so callers can tell "no data" apart
+        from "nothing running".
+        """
+        # Each section runs in the background into its own file, so the batch
+        # takes as long as its slowest section; outputs are then printed in order.
+        # Leading echo keeps the sentinel on its own line after unterminated output
+        script = '\n'.join([
+            'd=$(mktemp -d)',
+            *(f'( {cmd}\n) > "$d/{key}" &' for key, cmd in commands.items()),
+            'wait',
+            *(f'echo; echo ===__{key}__===; cat "$d/{key}"' for key in commands),
+            'rm -rf "$d"'
+        ])
+        success, output = self.execute_ssh_command(script, timeout=timeout)
+
+        results = dict.fromkeys(commands, '')
+        parts = _SECTION_RE.split(output)
+        for key, text in zip(parts[1::2], parts[2::2]):
+            results[key] = text.strip('\n')
+        return success, results
+
+    def docker_commands(self):
+        """Commands used by check_docker_services"""
+        return {'docker': f"cd {self.project_path} && docker compose ps -a --format json 2>&1"}
+
+    def check_docker_services(self, results=None):
         """Check Docker container status"""
+        if results is None:
+            _, results = self.execute_ssh_batch(self.docker_commands())
+
         print("🐳 Docker Services Status")
         print("=" * 60)
 
-        command = f"cd {self.project_path} && docker compose ps --format json 2>/dev/null"
-        success, output = self.execute_ssh_command(command)
-
-        if not success:
-            # Try alternative command
-            command = f"cd {self.project_path} && docker ps --format json --filter label=com.docker.compose.project=qfieldcloud"
-            success, output = self.execute_ssh_command(command)
+        output = results.get('docker', '')
+        if not output.strip():
+            print("⚠️ No containers found")
+            return True
 
-        if not success:
+        # Display container status, stopping once every service has been seen
+        want = set(self._service_set)
+        parsed = False
+        for container in iter_containers(output):
+            parsed = True
+            service_name = container.get('Service')
+            if service_name not in want:
+                continue
+            want.discard(service_name)
+
+            state = container.get('State', 'unknown')
+            status_emoji = "✅" if state == "running" else "❌"
+            print(f"\n🔹 {service_name}")
+            print(f"   Status: {status_emoji} {state}")
+            print(f"   Container: {container.get('Name', 'Unknown')}")
+            print(f"   Uptime: {container.get('Status', '')}")
+
+            if not want:
+                break
+
+        if not parsed:
             print("❌ Failed to get Docker status")
+            print(f"   {output.strip()[:200]}")
             return False
 
-        try:
-            # Process docker output
-            containers = []
-            for line in output.strip().split('\n'):
-                if line:
-                    try:
-                        containers.append(json.loads(line))
-                    except:
-                        pass
-
-            if not containers:
-                # Try parsing as docker compose ps output
-                command = f"cd {self.project_path} && docker compose ps"
-                success, output = self.execute_ssh_command(command)
-
-                if success:
-                    print(output)
-                    return True
-            else:
-                # Display container status
-                for container in containers:
-                    name = container.get('Names', container.get('Name', 'Unknown'))
-                    state = container.get('State', 'unknown')
-                    status = container.get('Status', '')
-
-                    # Clean up name
-                    if '/' in name:
-                        name = name.replace('/', '')
-
-                    # Find matching service
-                    service_name = None
-                    for service in self.services:
-                        if service in name.lower():
-                            service_name = service
-                            break
-
-                    if service_name:
-                        status_emoji = "✅" if state == "running" else "❌"
-                        print(f"\n🔹 {service_name}")
-                        print(f"   Status: {status_emoji} {state}")
-                        print(f"   Container: {name}")
-                        print(f"   Uptime: {status}")
-
-            return True
-
-        except Exception as e:
-            print(f"❌ Error parsing Docker output: {e}")
-            return False
+        return True
 
-    def check_api_health(self):
+    def _probe(self, session, endpoint):
+        """GET one public endpoint; return (status_code, body) or (None, '')"""
+        try:
+            response = session.get(API_BASE_URL + endpoint, timeout=5, allow_redirects=False)
+            return response.status_code, response.text
+        except requests.RequestException:
+            return None, ''
+
+    def probe_api(self):
+        """Probe all API endpoints concurrently from this host"""
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=len(API_ENDPOINTS)) as executor:
+            futures = {
+                key: executor.submit(self._probe, session, endpoint)
+                for key, endpoint, _ in API_ENDPOINTS
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    def check_api_health(self, probes=None):
         """Check QFieldCloud API health"""
+        if probes is None:
+            probes = self.probe_api()
+
         print("\n🏥 API Health Check")
         print("=" * 60)
 
-        # Check main API endpoint
-        command = 'curl -s -o /dev/null -w "%{http_code}" https://qfield.fibreflow.app/api/v1/status/'
-        success, status_code = self.execute_ssh_command(command)
+        for key, endpoint, name in API_ENDPOINTS:
+            code, body = probes.get(key, (None, ''))
+
+            if key != 'status':
+                if code in [200, 301, 302]:
+                    print(f"✅ {name}: OK ({code})")
+                elif code:
+                    print(f"❌ {name}: {code}")
+                continue
 
-        if success:
-            code = status_code.strip()
-            if code == "200":
+            # Main API endpoint
+            if not code:
+                print("❌ API health check failed")
+            elif code == 200:
                 print("✅ API Status: OK (200)")
 
-                # Get detailed status
-                command = 'curl -s https://qfield.fibreflow.app/api/v1/status/'
-                success, response = self.execute_ssh_command(command)
-
-                if success and response:
-                    try:
-                        status_data = json.loads(response)
-                        print(f"   Database: {status_data.get('database', 'unknown')}")
-                        print(f"   Storage: {status_data.get('storage', 'unknown')}")
-                        print(f"   Version: {status_data.get('version', 'unknown')}")
-                    except:
-                        pass
+                # Detailed status from the same response
+                try:
+                    status_data = json.loads(body)
+                    print(f"   Database: {status_data.get('database', 'unknown')}")
+                    print(f"   Storage: {status_data.get('storage', 'unknown')}")
+                    print(f"   Version: {status_data.get('version', 'unknown')}")
+                except:
+                    pass
             else:
                 print(f"❌ API Status: {code}")
-        else:
-            print("❌ API health check failed")
 
-        # Check other endpoints
-        endpoints = [
-            ('/swagger/', 'API Documentation'),
-            ('/admin/', 'Admin Interface'),
-            ('/', 'Web Interface')
-        ]
-
-        for endpoint, name in endpoints:
-            command = f'curl -s -o /dev/null -w "%{{http_code}}" https://qfield.fibreflow.app{endpoint}'
-            success, status_code = self.execute_ssh_command(command)
-
-            if success:
-                code = status_code.strip()
-                if code in ["200", "301", "302"]:
-                    print(f"✅ {name}: OK ({code})")
-                else:
-                    print(f"❌ {name}: {code}")
-
-    def check_server_resources(self):
+    def resource_commands(self):
+        """Commands used by check_server_resources (raw /proc and df data, parsed locally)"""
+        return {
+            # Two /proc/stat samples 200 ms apart instead of top's ~1 s sample
+            'cpu': "head -1 /proc/stat; sleep 0.2; head -1 /proc/stat",
+            'memory': "grep -E '^(MemTotal|MemAvailable):' /proc/meminfo",
+            'disk': "df -B1 --output=size,used,avail,pcent / | tail -1",
+            'docker_df': "docker system df --format json"
+        }
+
+    def check_server_resources(self, results=None):
         """Check VPS resource usage"""
+        if results is None:
+            _, results = self.execute_ssh_batch(self.resource_commands())
+
         print("\n💻 Server Resources")
         print("=" * 60)
 
-        # CPU usage
-        command = "top -bn1 | grep 'Cpu(s)' | awk '{print $2}' | cut -d'%' -f1"
-        success, cpu_output = self.execute_ssh_command(command)
-        if success and cpu_output.strip():
-            print(f"CPU Usage: {cpu_output.strip()}%")
-
-        # Memory usage
-        command = "free -h | awk '/^Mem:/ {printf \"Total: %s, Used: %s, Free: %s, Usage: %.1f%%\", $2, $3, $4, $3/$2*100}'"
-        success, mem_output = self.execute_ssh_command(command)
-        if success and mem_output:
-            print(f"Memory: {mem_output}")
-
-        # Disk usage
-        command = "df -h / | awk 'NR==2 {printf \"Total: %s, Used: %s, Free: %s, Usage: %s\", $2, $3, $4, $5}'"
-        success, disk_output = self.execute_ssh_command(command)
-        if success and disk_output:
-            print(f"Disk: {disk_output}")
-
-        # Docker disk usage
-        command = "docker system df | grep 'Images\\|Containers\\|Volumes' | awk '{print $1 \": \" $2}'"
-        success, docker_output = self.execute_ssh_command(command)
-        if success and docker_output:
+        cpu_usage = _cpu_usage(results.get('cpu', ''))
+        if cpu_usage is not None:
+            print(f"CPU Usage: {cpu_usage:.1f}%")
+
+        # /proc/meminfo values are in kB
+        meminfo = {}
+        for line in results.get('memory', '').splitlines():
+            key, _, value = line.partition(':')
+            meminfo[key] = int(value.split()[0]) * 1024 if value.split() else 0
+        total, available = meminfo.get('MemTotal'), meminfo.get('MemAvailable')
+        if total:
+            used = total - (available or 0)
+            print(f"Memory: Total: {_format_size(total)}, Used: {_format_size(used)}, "
+                  f"Free: {_format_size(available or 0)}, Usage: {used / total * 100:.1f}%")
+
+        disk = results.get('disk', '').split()
+        if len(disk) == 4 and disk[0].isdigit():
+            size, used, avail = (int(value) for value in disk[:3])
+            print(f"Disk: Total: {_format_size(size)}, Used: {_format_size(used)}, "
+                  f"Free: {_format_size(avail)}, Usage: {disk[3]}")
+
+        docker_usage = []
+        for line in results.get('docker_df', '').splitlines():
+            try:
+                usage = json.loads(line)
+            except ValueError:
+                continue
+            docker_usage.append(f"{usage.get('Type')}: {usage.get('TotalCount')} ({usage.get('Size')})")
+        if docker_usage:
             print(f"\nDocker Usage:")
-            for line in docker_output.strip().split('\n'):
+            for line in docker_usage:
                 print(f"  {line}")
 
-    def check_database_status(self):
+    def database_commands(self):
+        """Commands used by check_database_status (readiness line, then size if ready)"""
+        return {
+            'database': (
+                f"docker exec {self.db_container} sh -c "
+                "'pg_isready -U qfieldcloud_db_admin && psql -U qfieldcloud_db_admin -d qfieldcloud_db -tAc "
+                "\"SELECT pg_size_pretty(pg_database_size(current_database()))\"' 2>/dev/null"
+            )
+        }
+
+    def check_database_status(self, results=None):
         """Check PostgreSQL database status"""
+        if results is None:
+            _, results = self.execute_ssh_batch(self.database_commands())
+
         print("\n🗄️ Database Status")
         print("=" * 60)
 
-        # Check if database container is running
-        command = f"cd {self.project_path} && docker compose exec -T db pg_isready -U qfieldcloud_db_admin 2>/dev/null"
-        success, output = self.execute_ssh_command(command)
-
-        if success and "accepting connections" in output:
+        ready, _, size = results.get('database', '').partition('\n')
+        if "accepting connections" in ready:
             print("✅ PostgreSQL is accepting connections")
 
-            # Get database size
-            command = f"""cd {self.project_path} && docker compose exec -T db psql -U qfieldcloud_db_admin -d qfieldcloud_db -c "SELECT pg_database_size('qfieldcloud_db'), pg_size_pretty(pg_database_size('qfieldcloud_db'))" -t 2>/dev/null"""
-            success, size_output = self.execute_ssh_command(command)
-
-            if success and size_output:
-                size_parts = size_output.strip().split('|')
-                if len(size_parts) > 1:
-                    print(f"   Database Size: {size_parts[1].strip()}")
+            if size.strip():
+                print(f"   Database Size: {size.strip()}")
         else:
             print("❌ PostgreSQL is not responding")
 
-    def check_recent_errors(self):
+    def error_commands(self):
+        """Commands used by check_recent_errors"""
+        return {
+            f'errors_{service}': (
+                f"cd {self.project_path} && docker compose logs --since 1h --no-log-prefix {service} 2>&1 "
+                "| grep -aiE 'error|exception|failed'"
+            )
+            for service in ERROR_LOG_SERVICES
+        }
+
+    def check_recent_errors(self, results=None):
         """Check for recent errors in logs"""
+        if results is None:
+            _, results = self.execute_ssh_batch(self.error_commands())
+
         print("\n⚠️ Recent Errors (last hour)")
         print("=" * 60)
 
-        services_to_check = ['app', 'nginx', 'worker_wrapper']
+        for service in ERROR_LOG_SERVICES:
+            count, recent = _parse_logs(results.get(f'errors_{service}', ''))
 
-        for service in services_to_check:
-            command = f"cd {self.project_path} && docker compose logs --tail 50 {service} 2>&1 | grep -i 'error\\|exception\\|failed' | tail -5"
-            success, output = self.execute_ssh_command(command)
-
-            if success and output.strip():
-                print(f"\n{service}:")
-                for line in output.strip().split('\n')[:5]:
+            if count:
+                print(f"\n{service}: {count} in the last hour")
+                for line in recent:
                     print(f"  • {line[:100]}...")
             else:
                 print(f"\n{service}: No recent errors ✅")
 
-    def check_ssl_certificate(self):
+    def fetch_certificate_expiry(self):
+        """(notAfter, error) for the served certificate, from one local TLS handshake
+
+        notAfter is '' when the certificate could not be read; error is the
+        verification failure (expired, self-signed, wrong host) if there was one.
+        """
+        context = ssl.create_default_context()
+        try:
+            with socket.create_connection((API_HOST, 443), timeout=5) as sock:
+                with context.wrap_socket(sock, server_hostname=API_HOST) as tls:
+                    return tls.getpeercert()['notAfter'], None
+        except ssl.SSLCertVerificationError as e:
+            return '', e.verify_message or str(e)
+        except (OSError, KeyError):
+            return '', None
+
+    def check_ssl_certificate(self, certificate=None):
         """Check SSL certificate status"""
+        if certificate is None:
+            certificate = self.fetch_certificate_expiry()
+        expiry, error = certificate
+
         print("\n🔐 SSL Certificate Status")
         print("=" * 60)
 
-        command = "echo | openssl s_client -servername qfield.fibreflow.app -connect qfield.fibreflow.app:443 2>/dev/null | openssl x509 -noout -dates"
-        success, output = self.execute_ssh_command(command)
-
-        if success and output:
-            for line in output.strip().split('\n'):
-                if 'notAfter' in line:
-                    expiry = line.split('=')[1]
-                    print(f"Certificate expires: {expiry}")
+        if error:
+            print(f"❌ Certificate invalid or expired: {error}")
+        elif expiry:
+            print(f"Certificate expires: {expiry}")
 
-                    # Check if expiring soon
-                    command = f"echo | openssl s_client -servername qfield.fibreflow.app -connect qfield.fibreflow.app:443 2>/dev/null | openssl x509 -noout -checkend 604800"
-                    success, check_output = self.execute_ssh_command(command)
-
-                    if success:
-                        if "will not expire" in check_output:
-                            print("✅ Certificate valid for more than 7 days")
-                        else:
-                            print("⚠️ Certificate expires within 7 days!")
+            # Check if expiring soon
+            if ssl.cert_time_to_seconds(expiry) - time.time() > CERT_WARN_SECONDS:
+                print("✅ Certificate valid for more than 7 days")
+            else:
+                print("⚠️ Certificate expires within 7 days!")
         else:
             print("❌ Could not check certificate status")
 
+    def status_commands(self):
+        """Commands used by get_status"""
+        commands = self.docker_commands()
+        commands.update(self.database_commands())
+        commands['disk_pct'] = "df --output=pcent / | tail -1"
+        commands['queue_depth'] = (
+            f"docker exec {self.db_container} psql -U qfieldcloud_db_admin -d qfieldcloud_db -tA "
+            "-c \"SELECT count(*) FROM core_job WHERE status IN ('pending', 'queued')\" 2>/dev/null"
+        )
+        return commands
+
+    def get_status(self, use_cache=True):
+        """Collect health flags and per-service container state (used by remediate.py)"""
+        if use_cache:
+            cached = self._cache.load()
+            if cached is not None:
+                return cached
+
+        success, results = self.execute_ssh_batch(self.status_commands())
+        if not success:
+            # No diagnostics rather than an all-unhealthy snapshot
+            return {'timestamp': datetime.now().isoformat(), 'error': 'Could not reach the VPS over SSH'}
+
+        containers = {}
+        for container in iter_containers(results['docker']):
+            service = container.get('Service')
+            if service in self._service_set and service not in containers:
+                containers[service] = container.get('State', 'unknown')
+                if len(containers) == len(self._service_set):
+                    break
+
+        queue_depth = results['queue_depth'].strip()
+        disk_pct = results['disk_pct'].strip().rstrip('%')
+
+        status = {
+            'timestamp': datetime.now().isoformat(),
+            'containers': containers,
+            'worker_healthy': containers.get('worker_wrapper') == 'running',
+            'database_healthy': 'accepting connections' in results['database'],
+            'queue_depth': int(queue_depth) if queue_depth.isdigit() else 0,
+            'disk_usage_pct': int(disk_pct) if disk_pct.isdigit() else 0
+        }
+        self._cache.save(status)
+        return status
+
     def monitor(self, detailed=False):
         """Run complete monitoring check"""
         print(f"\n🔍 QFieldCloud Status Monitor")
@@ -297,19 +516,91 @@ class QFieldCloudMonitor:
         print(f"🌐 URL: https://qfield.fibreflow.app")
         print("=" * 60)
 
-        # Run all checks
-        self.check_docker_services()
-        self.check_api_health()
-        self.check_server_resources()
-        self.check_database_status()
+        # Collect every remote check's commands for one SSH round trip
+        command_sets = [self.docker_commands, self.resource_commands, self.database_commands]
+        if detailed:
+            command_sets.append(self.error_commands)
+
+        commands = {}
+        for get_commands in command_sets:
+            commands.update(get_commands())
+
+        # Public endpoints are probed locally while the batch runs on the VPS
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            api_probes = executor.submit(self.probe_api)
+            if detailed:
+                cert_expiry = executor.submit(self.fetch_certificate_expiry)
+            success, results = self.execute_ssh_batch(commands)
+
+        if not success:
+            print("❌ Could not reach the VPS over SSH; server checks below are incomplete\n")
+        self.check_docker_services(results)
+        self.check_api_health(api_probes.result())
+        self.check_server_resources(results)
+        self.check_database_status(results)
 
         if detailed:
-            self.check_recent_errors()
-            self.check_ssl_certificate()
+            self.check_recent_errors(results)
+            self.check_ssl_certificate(cert_expiry.result())
 
         print("\n" + "=" * 60)
         print("✅ Status check complete")
 
+    def monitor_fast(self):
+        """Cheap critical checks: API health and database readiness"""
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            api_probes = executor.submit(self.probe_api)
+            success, results = self.execute_ssh_batch({
+                'database': f"docker exec {self.db_container} pg_isready -U qfieldcloud_db_admin 2>/dev/null"
+            })
+
+        if not success:
+            print("❌ Could not reach the VPS over SSH")
+
+        self.check_api_health(api_probes.result())
+        self.check_database_status(results)
+
+    def monitor_slow(self):
+        """Expensive checks: containers, resources, database size, logs and SSL"""
+        commands = {}
+        for get_commands in (self.docker_commands, self.resource_commands,
+                             self.database_commands, self.error_commands):
+            commands.update(get_commands())
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            cert_expiry = executor.submit(self.fetch_certificate_expiry)
+            success, results = self.execute_ssh_batch(commands)
+
+        if not success:
+            print("❌ Could not reach the VPS over SSH; server checks below are incomplete\n")
+        self.check_docker_services(results)
+        self.check_server_resources(results)
+        self.check_database_status(results)
+        self.check_recent_errors(results)
+        self.check_ssl_certificate(cert_expiry.result())
+
+    def monitor_loop(self, interval=10, slow_interval=300):
+        """Poll: fast checks every interval seconds, slow checks every slow_interval"""
+        print(f"\n🔍 QFieldCloud Status Monitor (fast every {interval}s, full every {slow_interval}s)")
+        print(f"🖥️ Server: {self.vps_host}")
+
+        next_fast = next_slow = time.monotonic()
+        while True:
+            now = time.monotonic()
+
+            if now >= next_fast:
+                print(f"\n⏱️ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                print("=" * 60)
+                self.monitor_fast()
+                next_fast = now + interval
+
+            if now >= next_slow:
+                self.monitor_slow()
+                next_slow = now + slow_interval
+
+            time.sleep(max(0, min(next_fast, next_slow) - time.monotonic()))
+
+
 def main():
     parser = argparse.ArgumentParser(description='Monitor QFieldCloud status')
     parser.add_argument(
@@ -322,11 +613,34 @@ def main():
         action='store_true',
         help='Output in JSON format (coming soon)'
     )
+    parser.add_argument(
+        '--loop',
+        action='store_true',
+        help='Keep polling: cheap checks every --interval, full checks every --slow-interval'
+    )
+    parser.add_argument(
+        '--interval',
+        type=int,
+        default=10,
+        help='Seconds between API/database readiness checks in --loop mode (default: 10)'
+    )
+    parser.add_argument(
+        '--slow-interval',
+        type=int,
+        default=300,
+        help='Seconds between full checks in --loop mode (default: 300)'
+    )
 
     args = parser.parse_args()
 
     monitor = QFieldCloudMonitor()
-    monitor.monitor(detailed=args.detailed)
+    if args.loop:
+        try:
+            monitor.monitor_loop(args.interval, args.slow_interval)
+        except KeyboardInterrupt:
+            print("\n\nMonitoring stopped")
+    else:
+        monitor.monitor(detailed=args.detailed)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
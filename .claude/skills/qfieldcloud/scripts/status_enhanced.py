@@ -4,12 +4,22 @@ Enhanced QFieldCloud Status Dashboard
 Includes comprehensive worker health monitoring and sync readiness checks.
 """
 
-import subprocess
+import http.client
 import json
+import os
+import subprocess
+import re
+import socket
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from cgroup_stats import CgroupStats
+from local_host import primary_ip
+
 # Terminal colors
 GREEN = '\033[92m'
 YELLOW = '\033[93m'
@@ -18,6 +28,42 @@ BLUE = '\033[94m'
 BOLD = '\033[1m'
 RESET = '\033[0m'
 
+# psql flags for the persistent session: unaligned '|'-separated rows, no
+# headers or notices. Each query is followed by an \echo of PSQL_SENTINEL so
+# its output can be read back up to that line.
+PSQL_ARGS = ['psql', '-U', 'qfieldcloud_db_admin', '-d', 'qfieldcloud_db', '-At', '-F', '|', '-q']
+PSQL_SENTINEL = '---END---'
+
+# Docker Engine API socket; DOCKER_HOST overrides it when it is a unix:// URL
+DOCKER_SOCKET = '/var/run/docker.sock'
+
+# docker stats sizes ("412.3MiB", "1.5GiB", "980kB") and their multipliers
+SIZE_RE = re.compile(r'([\d.]+)\s*([KMGT]iB|[kKMGT]B|B)')
+SIZE_UNITS = {
+    'B': 1,
+    'KiB': 1 << 10, 'MiB': 1 << 20, 'GiB': 1 << 30, 'TiB': 1 << 40,
+    'kB': 10 ** 3, 'KB': 10 ** 3, 'MB': 10 ** 6, 'GB': 10 ** 9, 'TB': 10 ** 12,
+}
+
+# Worker log lines worth reporting: job pickups and errors
+WORKER_LOG_RE = re.compile(r'ERROR|CRITICAL|Dequeue')
+
+# Database container name pattern
+_DB_RE = re.compile(r'db|postgres')
+
+# Dashboard services, with their container name patterns
+DOCKER_SERVICES = {
+    'app': {'pattern': re.compile(r'qfieldcloud.*app'), 'critical': True},
+    'database': {'pattern': _DB_RE, 'critical': True},
+    'nginx': {'pattern': re.compile(r'nginx'), 'critical': False},
+    'redis': {'pattern': re.compile(r'redis'), 'critical': False},
+    'memcached': {'pattern': re.compile(r'memcached'), 'critical': True},
+    'worker': {'pattern': re.compile(r'worker_wrapper|qfieldcloud-worker'), 'critical': True},
+}
+
+# Looked up once per run, for the QField app server URL
+_LOCAL_IP = primary_ip()
+
 def run_command(cmd, capture=True):
     """Execute shell command"""
     try:
@@ -38,155 +84,448 @@ def format_status(status, text=""):
         return f"{BLUE}ℹ️  {text}{RESET}"
     return text
 
-def check_docker_services():
-    """Check all QFieldCloud Docker services"""
-    print(f"\n{BOLD}=== DOCKER SERVICES ==={RESET}")
-
-    services = {
-        'app': {'pattern': 'qfieldcloud.*app', 'critical': True},
-        'database': {'pattern': 'db|postgres', 'critical': True},
-        'nginx': {'pattern': 'nginx', 'critical': False},
-        'redis': {'pattern': 'redis', 'critical': False},
-        'memcached': {'pattern': 'memcached', 'critical': True},
-        'worker': {'pattern': 'worker_wrapper|qfieldcloud-worker', 'critical': True},
-    }
-
-    all_good = True
-    critical_good = True
-
-    for name, config in services.items():
-        output, _ = run_command(f"docker ps --format '{{{{.Names}}}} {{{{.Status}}}}' | grep -E '{config['pattern']}'")
+def run_checks(checks, out):
+    """Run independent (callable, *args) checks in parallel
+
+    Every check returns (result, lines). The lines are appended to out in the
+    order the checks were given, so the dashboard reads the same as a serial
+    run. Returns the checks' results in that order.
+    """
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        results = []
+        for result, lines in executor.map(lambda check: check[0](*check[1:]), checks):
+            out.extend(lines)
+            results.append(result)
+    return results
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a unix socket"""
+    def __init__(self, path, timeout=30):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+def _demux_logs(raw):
+    """Docker log payload to text
+
+    Containers without a TTY get 8-byte frame headers (stream, 0, 0, 0, size);
+    anything that doesn't look like a frame is passed through as-is.
+    """
+    chunks = []
+    i = 0
+    while i + 8 <= len(raw) and raw[i] in (0, 1, 2) and raw[i + 1:i + 4] == b'\0\0\0':
+        size = int.from_bytes(raw[i + 4:i + 8], 'big')
+        chunks.append(raw[i + 8:i + 8 + size])
+        i += 8 + size
+    chunks.append(raw[i:])
+    return b''.join(chunks).decode('utf-8', errors='replace')
+
+class DockerAPI:
+    """Docker Engine API over the local socket
+
+    One keep-alive connection for the whole run and JSON replies, instead of
+    starting the docker CLI for every query.
+    """
+    def __init__(self, path):
+        self._conn = _UnixHTTPConnection(path)
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """GET url, returning the body; raises OSError on failure"""
+        with self._lock:
+            try:
+                self._conn.request('GET', url)
+                response = self._conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._conn.close()
+                raise OSError(str(e)) from e
+        if response.status != 200:
+            raise OSError(f"{url}: HTTP {response.status}")
+        return body
+
+    def containers(self):
+        """All containers as (name, status) pairs"""
+        return [(c['Names'][0].lstrip('/'), c['Status'])
+                for c in json.loads(self.get('/containers/json?all=1'))]
+
+    def stats(self, name):
+        """(memory bytes, memory limit bytes, CPU %) like 'docker stats' shows
+
+        Not one-shot: the CPU percentage needs the daemon's second sample.
+        """
+        data = json.loads(self.get(f'/containers/{name}/stats?stream=false'))
+        memory = data.get('memory_stats', {})
+        cache = memory.get('stats', {})
+        usage = memory.get('usage', 0) - cache.get('inactive_file', cache.get('total_inactive_file', 0))
+
+        cpu, precpu = data.get('cpu_stats', {}), data.get('precpu_stats', {})
+        cpu_delta = cpu.get('cpu_usage', {}).get('total_usage', 0) - precpu.get('cpu_usage', {}).get('total_usage', 0)
+        system_delta = cpu.get('system_cpu_usage', 0) - precpu.get('system_cpu_usage', 0)
+        cpus = cpu.get('online_cpus') or 1
+        percent = cpu_delta / system_delta * cpus * 100 if cpu_delta > 0 and system_delta > 0 else 0.0
+
+        return usage, memory.get('limit', 0), percent
+
+    def logs(self, name, since=None, tail=None):
+        """Container stdout and stderr as text"""
+        url = f'/containers/{name}/logs?stdout=1&stderr=1'
+        if since is not None:
+            url += f'&since={int(time.time() - since)}'
+        if tail is not None:
+            url += f'&tail={tail}'
+        return _demux_logs(self.get(url))
+
+    def close(self):
+        self._conn.close()
+
+_docker_api = None
+
+def docker_api():
+    """The shared DockerAPI, or None when the daemon socket can't be used"""
+    global _docker_api
+    if _docker_api is None:
+        host = os.getenv('DOCKER_HOST', f'unix://{DOCKER_SOCKET}')
+        if not host.startswith('unix://'):
+            _docker_api = False
+        else:
+            api = DockerAPI(host[len('unix://'):])
+            try:
+                api.get('/_ping')
+                _docker_api = api
+            except OSError:
+                _docker_api = False
+    return _docker_api or None
+
+def _format_bytes(num_bytes):
+    """Bytes in docker stats notation, e.g. 412.3MiB"""
+    size = float(num_bytes)
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+def parse_size(text):
+    """Bytes in a docker stats size such as '412.3MiB', or None"""
+    match = SIZE_RE.match(text.strip())
+    if not match:
+        return None
+    return float(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+def snapshot_containers():
+    """All containers as (name, status) pairs, from a single listing"""
+    api = docker_api()
+    if api:
+        try:
+            return api.containers()
+        except OSError:
+            pass
+    output, _ = run_command("docker ps -a --format '{{.Names}}\t{{.Status}}'")
+    return [tuple(line.split('\t', 1)) for line in output.split('\n') if '\t' in line]
+
+def worker_container_id():
+    """Full ID of the worker container, or '' if there is none"""
+    api = docker_api()
+    if api:
+        try:
+            return json.loads(api.get('/containers/qfieldcloud-worker/json'))['Id']
+        except (OSError, ValueError, KeyError):
+            pass
+    output, _ = run_command("docker inspect -f '{{.Id}}' qfieldcloud-worker")
+    return output
+
+def worker_resources():
+    """Worker (memory bytes or None, memory text, CPU text), or None if unavailable
+
+    Read from the worker's cgroup files where possible; docker stats makes
+    dockerd take two samples a second or more apart.
+    """
+    cgroup = CgroupStats.for_container(worker_container_id())
+    if cgroup:
+        try:
+            usage = cgroup.memory()
+            return usage, _format_bytes(usage), f"{cgroup.cpu_percent():.2f}%"
+        except (OSError, ValueError):
+            pass
 
-        if output:
-            container_info = output.split('\n')[0].split()
-            container_name = container_info[0]
-            uptime = ' '.join(container_info[1:])
-            print(format_status("ok", f"{name:<12} {container_name:<30} {uptime}"))
+    api = docker_api()
+    if api:
+        try:
+            usage, _, cpu = api.stats('qfieldcloud-worker')
+            return usage, _format_bytes(usage), f"{cpu:.2f}%"
+        except OSError:
+            pass
+
+    stats, _ = run_command("docker stats --no-stream --format '{{.MemUsage}}\t{{.CPUPerc}}' qfieldcloud-worker")
+    if not stats:
+        return None
+    mem_field, _, cpu = stats.partition('\t')
+    mem_usage = mem_field.split(' / ')[0]
+    return parse_size(mem_usage), mem_usage, cpu
+
+def worker_logs(since=None, tail=None):
+    """Worker log text (stdout and stderr)"""
+    api = docker_api()
+    if api:
+        try:
+            return api.logs('qfieldcloud-worker', since=since, tail=tail)
+        except OSError:
+            pass
+
+    flags = (f" --since {since}s" if since is not None else "") + (f" --tail {tail}" if tail is not None else "")
+    logs, _ = run_command(f"docker logs qfieldcloud-worker{flags} 2>&1")
+    return logs
+
+def running_names(containers):
+    """Names of the running containers in a snapshot"""
+    return [name for name, status in containers if status.startswith('Up')]
+
+def find_db_container(containers):
+    """First running database container in a snapshot, or None"""
+    return next((n for n in running_names(containers) if _DB_RE.search(n)), None)
+
+def check_docker_services(containers):
+    """Check all QFieldCloud Docker services; the result is {service: is_running}"""
+    lines = []
+    lines.append(f"\n{BOLD}=== DOCKER SERVICES ==={RESET}")
+
+    running = {}
+    up = [c for c in containers if c[1].startswith('Up')]
+
+    for name, config in DOCKER_SERVICES.items():
+        match = next((c for c in up if config['pattern'].search(c[0])), None)
+        running[name] = match is not None
+
+        if match:
+            container_name, uptime = match
+            lines.append(format_status("ok", f"{name:<12} {container_name:<30} {uptime}"))
+        elif config['critical']:
+            lines.append(format_status("error", f"{name:<12} NOT RUNNING (CRITICAL)"))
         else:
-            if config['critical']:
-                print(format_status("error", f"{name:<12} NOT RUNNING (CRITICAL)"))
-                critical_good = False
-                all_good = False
-            else:
-                print(format_status("warning", f"{name:<12} NOT RUNNING"))
-                all_good = False
+            lines.append(format_status("warning", f"{name:<12} NOT RUNNING"))
 
-    return all_good, critical_good
+    return running, lines
 
-def check_worker_health():
+def check_worker_health(containers):
     """Detailed worker health check"""
-    print(f"\n{BOLD}=== WORKER HEALTH ==={RESET}")
+    lines = []
+    lines.append(f"\n{BOLD}=== WORKER HEALTH ==={RESET}")
 
     # Check if worker exists
-    output, _ = run_command("docker ps -a --format '{{.Names}} {{.Status}}' | grep -E 'worker'")
+    worker = next((c for c in containers if 'worker' in c[0]), None)
 
-    if not output:
-        print(format_status("error", "No worker container found"))
-        print(format_status("info", "Build with: docker compose build worker_wrapper"))
-        return False
+    if not worker:
+        lines.append(format_status("error", "No worker container found"))
+        lines.append(format_status("info", "Build with: docker compose build worker_wrapper"))
+        return False, lines
 
-    container_info = output.split('\n')[0]
+    container_info = ' '.join(worker)
 
     if "Up" in container_info:
-        print(format_status("ok", f"Worker running: {container_info}"))
+        lines.append(format_status("ok", f"Worker running: {container_info}"))
 
         # Check resource usage
-        stats, _ = run_command("docker stats qfieldcloud-worker --no-stream --format '{{json .}}'")
-        if stats:
-            try:
-                data = json.loads(stats)
-                mem_usage = data.get('MemUsage', '0MiB').split(' / ')[0]
-                cpu = data.get('CPUPerc', '0%')
-                print(format_status("info", f"Resources: Memory {mem_usage}, CPU {cpu}"))
-
-                # Check if memory is high
-                mem_mb = float(mem_usage.replace('MiB', '').replace('GiB', '000'))
-                if mem_mb > 500:
-                    print(format_status("warning", f"High memory usage: {mem_mb}MB"))
-            except:
-                pass
+        resources = worker_resources()
+        if resources:
+            mem_bytes, mem_usage, cpu = resources
+            lines.append(format_status("info", f"Resources: Memory {mem_usage}, CPU {cpu}"))
+
+            # Check if memory is high
+            mem_mb = (mem_bytes or 0) / (1024 * 1024)
+            if mem_mb > 500:
+                lines.append(format_status("warning", f"High memory usage: {mem_mb:.1f}MB"))
+
+        # One log fetch, scanned once for both activity and errors
+        logs = worker_logs(since=300)
+        activity = None
+        errors = []
+        for line in logs.split('\n'):
+            if WORKER_LOG_RE.search(line):
+                if 'Dequeue' in line:
+                    activity = line
+                else:
+                    errors.append(line)
 
         # Check recent activity
-        logs, _ = run_command("docker logs qfieldcloud-worker --tail 100 --since '5m' 2>&1 | grep 'Dequeue' | tail -1")
-        if logs:
-            print(format_status("ok", f"Recent activity: {logs[:80]}..."))
+        if activity:
+            lines.append(format_status("ok", f"Recent activity: {activity[:80]}..."))
         else:
-            print(format_status("warning", "No recent activity (might be idle)"))
+            lines.append(format_status("warning", "No recent activity (might be idle)"))
 
         # Check for errors
-        errors, _ = run_command("docker logs qfieldcloud-worker --tail 100 2>&1 | grep -E 'ERROR|CRITICAL' | tail -3")
         if errors:
-            print(format_status("warning", "Recent errors detected:"))
-            for line in errors.split('\n'):
-                if line:
-                    print(f"  {RED}{line[:100]}{RESET}")
+            lines.append(format_status("warning", "Recent errors detected:"))
+            for line in errors[-3:]:
+                lines.append(f"  {RED}{line[:100]}{RESET}")
 
-        return True
+        return True, lines
     else:
-        print(format_status("error", f"Worker stopped: {container_info}"))
+        lines.append(format_status("error", f"Worker stopped: {container_info}"))
 
         # Get last logs
-        logs, _ = run_command("docker logs qfieldcloud-worker --tail 10 2>&1")
+        logs = worker_logs(tail=10)
         if "Permission denied" in logs:
-            print(format_status("error", "Docker socket permission issue"))
-            print(format_status("info", "Fix: Run with --user root"))
+            lines.append(format_status("error", "Docker socket permission issue"))
+            lines.append(format_status("info", "Fix: Run with --user root"))
         elif "could not translate host name" in logs:
-            print(format_status("error", "Database connectivity issue"))
-            print(format_status("info", "Fix: Check database container name"))
-
-        return False
+            lines.append(format_status("error", "Database connectivity issue"))
+            lines.append(format_status("info", "Fix: Check database container name"))
+
+        return False, lines
+
+# One scan of core_job for every queue metric, one row per status
+QUEUE_COUNTS_SQL = (
+    "SELECT status,"
+    " COUNT(*) FILTER (WHERE created_at > NOW() - INTERVAL '1 hour') AS h1,"
+    " COUNT(*) AS total,"
+    " COUNT(*) FILTER (WHERE created_at < NOW() - INTERVAL '10 minutes') AS stuck"
+    " FROM core_job WHERE status IN ('pending','queued','started','failed')"
+    " GROUP BY status;"
+)
+
+class PsqlSession:
+    """One psql process inside the database container, reused for every query
+
+    Saves a docker exec, psql start-up and database connection per query.
+    """
+    def __init__(self, db_container):
+        self.db_container = db_container
+        self._process = None
+        self._lock = threading.Lock()
+
+    def _psql(self):
+        """The psql process, started on first use and after it exits"""
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ['docker', 'exec', '-i', self.db_container, *PSQL_ARGS],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1
+            )
+        return self._process
+
+    def query(self, sql, timeout=30):
+        """Run SQL in the session, returning its output or None"""
+        with self._lock:
+            try:
+                psql = self._psql()
+                psql.stdin.write(f"{sql}\n\\echo {PSQL_SENTINEL}\n")
+                psql.stdin.flush()
+            except Exception:
+                return None
+
+            # A hung query kills the session; the next query starts a new one
+            timer = threading.Timer(timeout, psql.kill)
+            timer.start()
+            lines = []
+            try:
+                for line in psql.stdout:
+                    line = line.rstrip('\n')
+                    if line == PSQL_SENTINEL:
+                        return '\n'.join(lines)
+                    lines.append(line)
+            finally:
+                timer.cancel()
+            return None
+
+    def close(self):
+        """End the psql session, if one was started"""
+        if self._process and self._process.poll() is None:
+            self._process.stdin.close()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+# Open psql sessions, one per database container
+_psql_sessions = {}
+
+def psql_session(db_container):
+    """The shared PsqlSession for db_container"""
+    if db_container not in _psql_sessions:
+        _psql_sessions[db_container] = PsqlSession(db_container)
+    return _psql_sessions[db_container]
+
+def close_psql_sessions():
+    """End every psql session opened by this run"""
+    while _psql_sessions:
+        _psql_sessions.popitem()[1].close()
+
+def get_queue_counts(db_container):
+    """Fetch all queue metrics in a single psql round-trip, or None on failure"""
+    output = psql_session(db_container).query(QUEUE_COUNTS_SQL)
+    if output is None:
+        return None
+
+    rows = {}
+    try:
+        for line in output.splitlines():
+            if line:
+                status, h1, total, stuck = line.split('|')
+                rows[status] = (int(h1), int(total), int(stuck))
+    except ValueError:
+        return None
+
+    def col(statuses, idx):
+        return sum(rows.get(st, (0, 0, 0))[idx] for st in statuses)
+
+    return {
+        'Pending/Queued': col(('pending', 'queued'), 1),
+        'Processing': col(('started',), 1),
+        'Failed (1hr)': col(('failed',), 0),
+        'Stuck (>10min)': col(('pending', 'queued'), 2),
+    }
 
-def check_queue_status():
-    """Check job queue status"""
-    print(f"\n{BOLD}=== QUEUE STATUS ==={RESET}")
+def check_queue_status(containers):
+    """Check job queue status; the result is (all_good, counts) for reuse by later checks"""
+    lines = []
+    lines.append(f"\n{BOLD}=== QUEUE STATUS ==={RESET}")
 
     # Check if database is accessible
-    db_container, _ = run_command("docker ps --format '{{.Names}}' | grep -E 'db|postgres' | head -1")
+    db_container = find_db_container(containers)
 
     if not db_container:
-        print(format_status("error", "Database not running, cannot check queue"))
-        return False
-
-    # Get queue metrics
-    queries = {
-        'Pending/Queued': "SELECT COUNT(*) FROM core_job WHERE status IN ('pending', 'queued');",
-        'Processing': "SELECT COUNT(*) FROM core_job WHERE status = 'started';",
-        'Failed (1hr)': "SELECT COUNT(*) FROM core_job WHERE status = 'failed' AND created_at > NOW() - INTERVAL '1 hour';",
-        'Stuck (>10min)': f"SELECT COUNT(*) FROM core_job WHERE status IN ('pending', 'queued') AND created_at < NOW() - INTERVAL '10 minutes';"
-    }
+        lines.append(format_status("error", "Database not running, cannot check queue"))
+        return (False, None), lines
 
-    all_good = True
-    for label, query in queries.items():
-        output, rc = run_command(
-            f'docker exec {db_container} psql -U qfieldcloud_db_admin -d qfieldcloud_db -t -c "{query}"'
-        )
+    counts = get_queue_counts(db_container)
+    if counts is None:
+        lines.append(format_status("error", f"{'Queue':<15} Query failed"))
+        return (False, None), lines
 
-        if rc == 0:
-            try:
-                count = int(output.strip() or 0)
-                if label == 'Pending/Queued' and count > 10:
-                    print(format_status("warning", f"{label:<15} {count} (high)"))
-                    all_good = False
-                elif label == 'Stuck (>10min)' and count > 0:
-                    print(format_status("error", f"{label:<15} {count} (needs cleanup)"))
-                    all_good = False
-                elif label == 'Failed (1hr)' and count > 5:
-                    print(format_status("warning", f"{label:<15} {count} (investigate)"))
-                    all_good = False
-                else:
-                    print(format_status("ok", f"{label:<15} {count}"))
-            except:
-                print(format_status("error", f"{label:<15} Error"))
-                all_good = False
-        else:
-            print(format_status("error", f"{label:<15} Query failed"))
+    all_good = True
+    for label, count in counts.items():
+        if label == 'Pending/Queued' and count > 10:
+            lines.append(format_status("warning", f"{label:<15} {count} (high)"))
             all_good = False
+        elif label == 'Stuck (>10min)' and count > 0:
+            lines.append(format_status("error", f"{label:<15} {count} (needs cleanup)"))
+            all_good = False
+        elif label == 'Failed (1hr)' and count > 5:
+            lines.append(format_status("warning", f"{label:<15} {count} (investigate)"))
+            all_good = False
+        else:
+            lines.append(format_status("ok", f"{label:<15} {count}"))
 
-    return all_good
+    return (all_good, counts), lines
 
-def check_sync_readiness():
-    """Overall sync readiness assessment"""
-    print(f"\n{BOLD}=== SYNC READINESS ==={RESET}")
+def check_sync_readiness(running, queue_counts):
+    """Overall sync readiness assessment
+
+    Built from check_docker_services' {service: is_running} and
+    check_queue_status' counts, without querying anything again. The queue
+    is Unknown (None) while the database is down.
+    """
+    lines = []
+    lines.append(f"\n{BOLD}=== SYNC READINESS ==={RESET}")
 
     readiness = {
         'API Server': False,
@@ -196,69 +535,57 @@ def check_sync_readiness():
         'Queue': False
     }
 
-    # Check each component
-    output, _ = run_command("docker ps --format '{{.Names}}' | grep -E 'app'")
-    readiness['API Server'] = bool(output)
-
-    output, _ = run_command("docker ps --format '{{.Names}}' | grep -E 'db|postgres'")
-    readiness['Database'] = bool(output)
-
-    output, _ = run_command("docker ps --format '{{.Names}}' | grep memcached")
-    readiness['Cache'] = bool(output)
+    # Components come straight from the docker services check
+    readiness['API Server'] = running['app']
+    readiness['Database'] = running['database']
+    readiness['Cache'] = running['memcached']
+    readiness['Worker'] = running['worker']
 
-    output, _ = run_command("docker ps --format '{{.Names}}' | grep -E 'worker'")
-    readiness['Worker'] = bool(output)
-
-    # Check queue health
-    db_container, _ = run_command("docker ps --format '{{.Names}}' | grep -E 'db|postgres' | head -1")
-    if db_container:
-        stuck, rc = run_command(
-            f'docker exec {db_container} psql -U qfieldcloud_db_admin -d qfieldcloud_db -t -c '
-            f'"SELECT COUNT(*) FROM core_job WHERE status IN (\'pending\', \'queued\') AND created_at < NOW() - INTERVAL \'10 minutes\';"'
-        )
-        try:
-            readiness['Queue'] = int(stuck.strip() or 0) == 0
-        except:
-            readiness['Queue'] = False
+    # Check queue health; without a database there is nothing to judge it by
+    if not running['database']:
+        readiness['Queue'] = None
+    elif queue_counts is not None:
+        readiness['Queue'] = queue_counts['Stuck (>10min)'] == 0
 
     # Display results
-    all_ready = all(readiness.values())
+    all_ready = all(ready is True for ready in readiness.values())
 
     for component, ready in readiness.items():
         if ready:
-            print(format_status("ok", f"{component:<15} Ready"))
+            lines.append(format_status("ok", f"{component:<15} Ready"))
+        elif ready is None:
+            lines.append(format_status("warning", f"{component:<15} Unknown (database down)"))
         else:
-            print(format_status("error", f"{component:<15} Not Ready"))
+            lines.append(format_status("error", f"{component:<15} Not Ready"))
 
     # Overall verdict
-    print(f"\n{BOLD}=== OVERALL STATUS ==={RESET}")
+    lines.append(f"\n{BOLD}=== OVERALL STATUS ==={RESET}")
 
     if all_ready:
-        print(format_status("ok", "SYNC FULLY OPERATIONAL"))
+        lines.append(format_status("ok", "SYNC FULLY OPERATIONAL"))
 
-        # Get local IP for configuration
-        local_ip, _ = run_command("hostname -I | awk '{print $1}'")
-        print(f"\n{BOLD}QField App Configuration:{RESET}")
-        print(f"  Server URL: http://{local_ip}:8011")
-        print(f"  Use QFieldCloud credentials to login")
+        lines.append(f"\n{BOLD}QField App Configuration:{RESET}")
+        lines.append(f"  Server URL: http://{_LOCAL_IP}:8011")
+        lines.append(f"  Use QFieldCloud credentials to login")
     else:
-        print(format_status("error", "SYNC NOT READY"))
-        print(f"\n{BOLD}Required Actions:{RESET}")
+        lines.append(format_status("error", "SYNC NOT READY"))
+        lines.append(f"\n{BOLD}Required Actions:{RESET}")
 
         if not readiness['Worker']:
-            print("  1. Start worker: docker compose up -d worker_wrapper")
+            lines.append("  1. Start worker: docker compose up -d worker_wrapper")
         if not readiness['Database']:
-            print("  2. Start database: docker compose up -d db")
+            lines.append("  2. Start database: docker compose up -d db")
         if not readiness['API Server']:
-            print("  3. Start API: docker compose up -d app")
-        if not readiness['Queue']:
-            print("  4. Clean stuck jobs: .claude/skills/qfieldcloud/scripts/clean_stuck_jobs.py")
+            lines.append("  3. Start API: docker compose up -d app")
+        if readiness['Queue'] is False:
+            lines.append("  4. Clean stuck jobs: .claude/skills/qfieldcloud/scripts/clean_stuck_jobs.py")
 
-    return all_ready
+    return all_ready, lines
 
 def check_monitoring_status():
     """Check if monitoring services are active"""
-    print(f"\n{BOLD}=== MONITORING STATUS ==={RESET}")
+    lines = []
+    lines.append(f"\n{BOLD}=== MONITORING STATUS ==={RESET}")
 
     # Check systemd services
     services_to_check = [
@@ -267,14 +594,19 @@ def check_monitoring_status():
         ('qfield-monitor.service', 'Prevention System')
     ]
 
+    # One systemctl call; it prints one state line per unit, in argument order
+    units = [service for service, _ in services_to_check]
+    output, _ = run_command(f"systemctl is-active {' '.join(units)}")
+    states = dict(zip(units, output.split('\n')))
+
     for service, name in services_to_check:
-        output, rc = run_command(f"systemctl is-active {service}")
-        if output == "active":
-            print(format_status("ok", f"{name:<20} Active"))
-        elif output == "inactive":
-            print(format_status("warning", f"{name:<20} Inactive"))
+        state = states.get(service, '')
+        if state == "active":
+            lines.append(format_status("ok", f"{name:<20} Active"))
+        elif state == "inactive":
+            lines.append(format_status("warning", f"{name:<20} Inactive"))
         else:
-            print(format_status("info", f"{name:<20} Not installed"))
+            lines.append(format_status("info", f"{name:<20} Not installed"))
 
     # Check for alert logs
     alert_file = Path('/var/log/qfield_worker_alerts.log')
@@ -282,45 +614,66 @@ def check_monitoring_status():
         # Get recent alerts
         output, _ = run_command(f"tail -5 {alert_file}")
         if output:
-            print(format_status("warning", "Recent Alerts:"))
+            lines.append(format_status("warning", "Recent Alerts:"))
             for line in output.split('\n'):
                 if line:
-                    print(f"  {YELLOW}{line}{RESET}")
+                    lines.append(f"  {YELLOW}{line}{RESET}")
+
+    return None, lines
 
 def show_quick_fixes():
-    """Show quick fix commands"""
-    print(f"\n{BOLD}=== QUICK FIXES ==={RESET}")
-    print(f"{BLUE}If sync isn't working:{RESET}")
-    print("  .claude/skills/qfieldcloud/scripts/sync_diagnostic.py")
-    print("")
-    print(f"{BLUE}Restart worker:{RESET}")
-    print("  .claude/skills/qfieldcloud/scripts/worker.py restart")
-    print("")
-    print(f"{BLUE}Install monitoring:{RESET}")
-    print("  sudo cp .claude/skills/qfieldcloud/scripts/qfield-worker*.service /etc/systemd/system/")
-    print("  sudo systemctl daemon-reload")
-    print("  sudo systemctl enable --now qfield-worker-monitor.service")
-    print("")
-    print(f"{BLUE}View logs:{RESET}")
-    print("  docker logs -f qfieldcloud-worker")
-    print("  journalctl -u qfield-worker-monitor -f")
+    """Quick fix commands, as output lines"""
+    lines = []
+    lines.append(f"\n{BOLD}=== QUICK FIXES ==={RESET}")
+    lines.append(f"{BLUE}If sync isn't working:{RESET}")
+    lines.append("  .claude/skills/qfieldcloud/scripts/sync_diagnostic.py")
+    lines.append("")
+    lines.append(f"{BLUE}Restart worker:{RESET}")
+    lines.append("  .claude/skills/qfieldcloud/scripts/worker.py restart")
+    lines.append("")
+    lines.append(f"{BLUE}Install monitoring:{RESET}")
+    lines.append("  sudo cp .claude/skills/qfieldcloud/scripts/qfield-worker*.service /etc/systemd/system/")
+    lines.append("  sudo systemctl daemon-reload")
+    lines.append("  sudo systemctl enable --now qfield-worker-monitor.service")
+    lines.append("")
+    lines.append(f"{BLUE}View logs:{RESET}")
+    lines.append("  docker logs -f qfieldcloud-worker")
+    lines.append("  journalctl -u qfield-worker-monitor -f")
+    return lines
 
 def main():
     """Main status check flow"""
-    print(f"{BOLD}{'='*60}{RESET}")
-    print(f"{BOLD}      QFIELDCLOUD STATUS DASHBOARD      {RESET}")
-    print(f"{BOLD}{'='*60}{RESET}")
+    # Checks return their lines; the whole dashboard is written at once
+    out = [
+        f"{BOLD}{'='*60}{RESET}",
+        f"{BOLD}      QFIELDCLOUD STATUS DASHBOARD      {RESET}",
+        f"{BOLD}{'='*60}{RESET}",
+    ]
 
-    # Run all checks
-    services_ok, critical_ok = check_docker_services()
-    worker_ok = check_worker_health()
-    queue_ok = check_queue_status()
-    sync_ready = check_sync_readiness()
-    check_monitoring_status()
+    # One container listing shared by every check
+    containers = snapshot_containers()
+
+    try:
+        # Independent checks run concurrently; sync readiness is built from
+        # their results
+        running, worker_ok, (queue_ok, queue_counts), _ = run_checks([
+            (check_docker_services, containers),
+            (check_worker_health, containers),
+            (check_queue_status, containers),
+            (check_monitoring_status,),
+        ], out)
+        sync_ready, lines = check_sync_readiness(running, queue_counts)
+        out.extend(lines)
+    finally:
+        close_psql_sessions()
+        if _docker_api:
+            _docker_api.close()
 
     # Show fixes if needed
     if not sync_ready:
-        show_quick_fixes()
+        out.extend(show_quick_fixes())
+
+    sys.stdout.write('\n'.join(out) + '\n')
 
     # Exit code
     sys.exit(0 if sync_ready else 1)
@@ -4,11 +4,32 @@ QFieldCloud Sync Diagnostic Tool
 Diagnoses and fixes common sync issues, especially missing worker services.
 """
 
+import re
 import subprocess
 import sys
 import json
 import time
 
+from local_host import primary_ip
+
+# QFieldCloud checkout on this host
+PROJECT_PATH = "/home/louisdup/VF/Apps/QFieldCloud"
+
+# Container name patterns, matched against one docker ps listing
+_DB_RE = re.compile(r'db|postgres')
+_WORKER_RE = re.compile(r'worker_wrapper|worker')
+
+# Services sync depends on, with their container name patterns
+REQUIRED_SERVICES = {
+    'app': {'pattern': re.compile(r'qfieldcloud.*app'), 'critical': True},
+    'database': {'pattern': re.compile(r'qfieldcloud.*db|postgres'), 'critical': True},
+    'memcached': {'pattern': re.compile(r'memcached'), 'critical': True},
+    'worker': {'pattern': _WORKER_RE, 'critical': True},  # MOST IMPORTANT FOR SYNC
+}
+
+# Looked up once per run, for the QField app server URL
+_LOCAL_IP = primary_ip()
+
 def run_command(cmd, capture=True):
     """Execute shell command and return output"""
     try:
@@ -21,23 +42,24 @@ def run_command(cmd, capture=True):
     except Exception as e:
         return str(e), 1
 
+def container_names(include_stopped=False):
+    """Container names from a single docker ps call"""
+    flags = " -a" if include_stopped else ""
+    output, _ = run_command(f"docker ps{flags} --format '{{{{.Names}}}}'")
+    return output.splitlines()
+
 def check_docker_services():
     """Check status of required Docker services for sync"""
     print("🔍 Checking Docker services...")
 
-    required_services = {
-        'app': {'pattern': 'qfieldcloud.*app', 'critical': True},
-        'database': {'pattern': 'qfieldcloud.*db|postgres', 'critical': True},
-        'memcached': {'pattern': 'memcached', 'critical': True},
-        'worker': {'pattern': 'worker_wrapper|worker', 'critical': True},  # MOST IMPORTANT FOR SYNC
-    }
+    names = container_names()
 
     status = {}
-    for service, config in required_services.items():
-        output, _ = run_command(f"docker ps --format '{{{{.Names}}}}' | grep -E '{config['pattern']}'")
-        if output:
-            status[service] = {'running': True, 'container': output.split('\n')[0]}
-            print(f"  ✅ {service}: {output.split()[0] if output else 'Not found'}")
+    for service, config in REQUIRED_SERVICES.items():
+        container = next((n for n in names if config['pattern'].search(n)), None)
+        if container:
+            status[service] = {'running': True, 'container': container}
+            print(f"  ✅ {service}: {container}")
         else:
             status[service] = {'running': False}
             emoji = "❌" if config['critical'] else "⚠️"
@@ -50,17 +72,19 @@ def diagnose_worker_issue():
     print("\n🔬 Diagnosing worker issues...")
 
     # Check if worker image exists
-    output, _ = run_command("docker images | grep worker_wrapper")
-    if not output:
+    output, _ = run_command("docker images --format '{{.Repository}}'")
+    if 'worker_wrapper' not in output:
         print("  ❌ Worker image not built")
         return "not_built"
 
     # Check if worker container exists but stopped
-    output, _ = run_command("docker ps -a | grep worker")
-    if output and "Exited" in output:
+    output, _ = run_command("docker ps -a --format '{{.Names}}\t{{.Status}}'")
+    containers = (line.split('\t', 1) for line in output.splitlines() if '\t' in line)
+    workers = [(name, state) for name, state in containers if _WORKER_RE.search(name)]
+    container_name = next((name for name, state in workers if "Exited" in state), None)
+    if container_name:
         print("  ⚠️  Worker container exists but stopped")
         # Get logs from stopped container
-        container_name = output.split()[0]
         logs, _ = run_command(f"docker logs {container_name} --tail 20")
         if "Permission denied" in logs:
             print("  ❌ Docker socket permission issue")
@@ -75,7 +99,7 @@ def diagnose_worker_issue():
             print(f"  ❌ Unknown error: {logs[:200]}")
             return "unknown"
 
-    if not output:
+    if not workers:
         print("  ⚠️  No worker container found")
         return "not_created"
 
@@ -85,24 +109,22 @@ def fix_worker(issue_type):
     """Attempt to fix worker based on issue type"""
     print(f"\n🔧 Attempting to fix: {issue_type}")
 
-    project_path = "/home/louisdup/VF/Apps/QFieldCloud"
-
     if issue_type == "not_built":
         print("  📦 Building worker image (this will take 10-15 minutes)...")
         print("  ℹ️  The build installs geospatial dependencies (GDAL, GEOS, etc)")
-        cmd = f"cd {project_path} && docker compose build worker_wrapper"
+        cmd = f"cd {PROJECT_PATH} && docker compose build worker_wrapper"
         print(f"  Running: {cmd}")
         run_command(cmd, capture=False)
 
     elif issue_type == "not_created" or issue_type == "permission_issue":
         # Get database container name
-        db_container, _ = run_command("docker ps --format '{{.Names}}' | grep -E 'db|postgres' | head -1")
+        db_container = next((n for n in container_names() if _DB_RE.search(n)), None)
         if not db_container:
             print("  ❌ Cannot start worker: Database not running")
             return False
 
         print(f"  🚀 Starting worker container...")
-        cmd = f"""cd {project_path} && docker run -d \\
+        cmd = f"""cd {PROJECT_PATH} && docker run -d \\
             --name qfieldcloud-worker \\
             --user root \\
             --network qfieldcloud_default \\
@@ -170,10 +192,8 @@ def check_sync_readiness():
     if all_critical:
         print("✅ SYNC READY - All services operational")
 
-        # Get local IP for QField app configuration
-        local_ip, _ = run_command("hostname -I | awk '{print $1}'")
         print(f"\n📱 Configure QField app:")
-        print(f"   Server URL: http://{local_ip}:8011")
+        print(f"   Server URL: http://{_LOCAL_IP}:8011")
         print(f"   Use your QFieldCloud credentials to login")
     else:
         print("❌ SYNC NOT READY - Fix issues above")
@@ -4,10 +4,34 @@ QFieldCloud Worker Management Tool
 Manages the critical worker_wrapper service needed for sync operations.
 """
 
+import re
+import queue
 import subprocess
 import sys
+import threading
 import time
 import argparse
+from collections import deque
+
+from cgroup_stats import CgroupStats
+
+# QFieldCloud checkout on this host
+PROJECT_PATH = "/home/louisdup/VF/Apps/QFieldCloud"
+
+# Log lines that flag trouble in 'status'
+WARNING_RE = re.compile(r'ERROR|WARNING')
+
+# Container name patterns, matched against one docker ps listing
+_DB_RE = re.compile(r'db|postgres')
+_WORKER_RE = re.compile(r'worker')
+
+# monitor: worker container events that trigger an immediate refresh, and the
+# refresh interval when no events arrive
+MONITOR_EVENTS = ('start', 'die', 'restart')
+MONITOR_IDLE_REFRESH = 30
+
+# monitor: recent worker log lines kept in memory by the log follower
+MONITOR_LOG_LINES = 200
 
 def run_command(cmd, capture=True):
     """Execute shell command and return output"""
@@ -21,40 +45,49 @@ def run_command(cmd, capture=True):
     except Exception as e:
         return str(e), 1
 
+def find_container(pattern, include_stopped=False):
+    """First container whose name matches pattern, as (name, status), or None"""
+    flags = " -a" if include_stopped else ""
+    output, _ = run_command(f"docker ps{flags} --format '{{{{.Names}}}}\t{{{{.Status}}}}'")
+    containers = (line.split('\t', 1) for line in output.split('\n') if '\t' in line)
+    return next(((name, state) for name, state in containers if pattern.search(name)), None)
+
+def worker_image_exists():
+    """Whether a worker_wrapper image has been built"""
+    output, _ = run_command("docker images --format '{{.Repository}}'")
+    return 'worker_wrapper' in output
+
 def status():
     """Check worker status"""
     print("🔍 Worker Status:")
 
-    # Check if running
-    output, _ = run_command("docker ps --format '{{.Names}} {{.Status}}' | grep worker")
-    if output:
-        print(f"  ✅ Running: {output}")
+    # One listing covers both the running and the stopped case
+    worker = find_container(_WORKER_RE, include_stopped=True)
+    if worker and worker[1].startswith('Up'):
+        print(f"  ✅ Running: {' '.join(worker)}")
 
         # Check logs for errors
-        logs, _ = run_command("docker logs qfieldcloud-worker --tail 5 2>&1 | grep -E 'ERROR|WARNING'")
-        if logs:
+        logs, _ = run_command("docker logs qfieldcloud-worker --tail 5 2>&1")
+        if WARNING_RE.search(logs):
             print(f"  ⚠️  Recent warnings/errors detected")
     else:
         print("  ❌ Not running")
 
         # Check if container exists but stopped
-        output, _ = run_command("docker ps -a --format '{{.Names}} {{.Status}}' | grep worker")
-        if output and "Exited" in output:
-            print(f"  ⚠️  Container stopped: {output}")
+        if worker and "Exited" in worker[1]:
+            print(f"  ⚠️  Container stopped: {' '.join(worker)}")
 
 def build():
     """Build worker image"""
     print("🔨 Building worker image...")
     print("  ⏱️  This takes 10-15 minutes (installs GDAL, GEOS, PostGIS...)")
 
-    project_path = "/home/louisdup/VF/Apps/QFieldCloud"
-    cmd = f"cd {project_path} && docker compose build worker_wrapper"
+    cmd = f"cd {PROJECT_PATH} && docker compose build worker_wrapper"
     print(f"  Running: {cmd}")
     run_command(cmd, capture=False)
 
     # Verify build
-    output, _ = run_command("docker images | grep worker_wrapper")
-    if output:
+    if worker_image_exists():
         print("  ✅ Build successful")
     else:
         print("  ❌ Build failed")
@@ -65,26 +98,22 @@ def start():
     print("🚀 Starting worker...")
 
     # Check if already running
-    output, _ = run_command("docker ps --format '{{.Names}}' | grep worker")
-    if output:
+    if find_container(_WORKER_RE):
         print("  ⚠️  Worker already running")
         return
 
     # Check if image exists
-    output, _ = run_command("docker images | grep worker_wrapper")
-    if not output:
+    if not worker_image_exists():
         print("  ❌ Worker image not found. Building first...")
         build()
 
     # Get database container
-    db_container, _ = run_command("docker ps --format '{{.Names}}' | grep -E 'db|postgres' | head -1")
-    if not db_container:
+    db = find_container(_DB_RE)
+    if not db:
         print("  ❌ Database not running. Start it first:")
         print("     docker start <database-container-name>")
         sys.exit(1)
 
-    project_path = "/home/louisdup/VF/Apps/QFieldCloud"
-
     # Remove old container if exists
     run_command("docker rm -f qfieldcloud-worker 2>/dev/null")
 
@@ -94,9 +123,9 @@ def start():
         --user root \
         --network qfieldcloud_default \
         -v /var/run/docker.sock:/var/run/docker.sock \
-        -v {project_path}/mediafiles:/usr/src/app/mediafiles \
+        -v {PROJECT_PATH}/mediafiles:/usr/src/app/mediafiles \
         -e DJANGO_SETTINGS_MODULE=qfieldcloud.settings \
-        -e POSTGRES_HOST={db_container} \
+        -e POSTGRES_HOST={db[0]} \
         -e POSTGRES_DB=qfieldcloud_db \
         -e POSTGRES_USER=qfieldcloud_db_admin \
         -e POSTGRES_PASSWORD=3shJDd2r7Twwkehb \
@@ -109,8 +138,7 @@ def start():
 
         # Wait and check if it's still running
         time.sleep(5)
-        output, _ = run_command("docker ps | grep worker")
-        if output:
+        if find_container(_WORKER_RE):
             print("  ✅ Worker is running")
         else:
             print("  ❌ Worker crashed. Check logs:")
@@ -145,27 +173,115 @@ def logs(lines=50, follow=False):
 
     run_command(cmd, capture=False)
 
+def _worker_cgroup():
+    """CgroupStats for the current worker container, or None"""
+    container_id, _ = run_command("docker inspect -f '{{.Id}}' qfieldcloud-worker")
+    return CgroupStats.for_container(container_id)
+
+def _worker_usage(cgroup):
+    """(memory, CPU) display strings, from the cgroup files when available"""
+    if cgroup:
+        try:
+            return f"{cgroup.memory() / (1024 * 1024):.1f}MiB", f"{cgroup.cpu_percent():.2f}%"
+        except (OSError, ValueError):
+            pass
+
+    # Memory and CPU from one no-stream stats sample
+    stats, _ = run_command("docker stats --no-stream --format '{{.MemUsage}}\t{{.CPUPerc}}' qfieldcloud-worker")
+    mem, _, cpu = stats.partition('\t')
+    return mem, cpu
+
+def _show_worker_state(log_lines, cgroup):
+    """Print the one-line worker summary used by monitor"""
+    # Check if running
+    if find_container(_WORKER_RE):
+        # Get job count: last 'Jobs from the DB' line the follower has seen
+        logs = next((l for l in reversed(list(log_lines)) if 'Jobs from the DB' in l), '')
+
+        mem, cpu = _worker_usage(cgroup)
+
+        print(f"\r✅ Worker running | Memory: {mem} | CPU: {cpu} | Last activity: {logs[:50]}...", end="", flush=True)
+    else:
+        print("\r❌ Worker not running                                                  ", end="", flush=True)
+
+def _watch_events(events):
+    """Feed worker container events from 'docker events' into a queue
+
+    Puts None when the stream ends (e.g. the docker daemon restarted).
+    """
+    proc = subprocess.Popen(
+        ['docker', 'events',
+         '--filter', 'type=container',
+         '--filter', 'container=qfieldcloud-worker',
+         '--format', '{{.Status}}'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True
+    )
+    for line in proc.stdout:
+        events.put(line.strip())
+    events.put(None)
+
+def _start_event_watcher(events):
+    """Start _watch_events in a daemon thread"""
+    threading.Thread(target=_watch_events, args=(events,), daemon=True).start()
+
+def _follow_logs(log_lines):
+    """Append worker log lines to a deque until the container stops"""
+    proc = subprocess.Popen(
+        ['docker', 'logs', '-f', '--tail', '100', 'qfieldcloud-worker'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
+    )
+    for line in proc.stdout:
+        log_lines.append(line.rstrip('\n'))
+
+def _start_log_follower(log_lines):
+    """Start _follow_logs in a daemon thread, returning the thread"""
+    thread = threading.Thread(target=_follow_logs, args=(log_lines,), daemon=True)
+    thread.start()
+    return thread
+
 def monitor():
-    """Monitor worker health in real-time"""
-    print("📊 Monitoring worker (Ctrl+C to stop)...")
+    """Monitor worker health in real-time
 
-    try:
-        while True:
-            # Check if running
-            output, _ = run_command("docker ps --format '{{.Names}}' | grep worker")
+    Driven by 'docker events': the worker is re-checked as soon as it starts,
+    dies or restarts, and otherwise every MONITOR_IDLE_REFRESH seconds. Log
+    lines are streamed into memory by 'docker logs -f' rather than re-read.
+    """
+    print("📊 Monitoring worker (Ctrl+C to stop)...")
 
-            if output:
-                # Get job count
-                logs, _ = run_command("docker logs qfieldcloud-worker --tail 100 | grep 'Jobs from the DB' | tail -1")
+    events = queue.Queue()
+    _start_event_watcher(events)
 
-                # Get memory usage
-                stats, _ = run_command("docker stats qfieldcloud-worker --no-stream --format '{{.MemUsage}}'")
+    log_lines = deque(maxlen=MONITOR_LOG_LINES)
+    follower = _start_log_follower(log_lines)
 
-                print(f"\r✅ Worker running | Memory: {stats} | Last activity: {logs[:50]}...", end="")
-            else:
-                print("\r❌ Worker not running                                                  ", end="")
+    # Resolved once, and again whenever the container (re)starts
+    cgroup = _worker_cgroup()
 
-            time.sleep(5)
+    try:
+        _show_worker_state(log_lines, cgroup)
+        while True:
+            try:
+                event = events.get(timeout=MONITOR_IDLE_REFRESH)
+                if event is None:
+                    # Event stream ended; reconnect after a short pause
+                    time.sleep(5)
+                    _start_event_watcher(events)
+                elif event not in MONITOR_EVENTS:
+                    continue
+                elif event == 'start':
+                    cgroup = _worker_cgroup()
+            except queue.Empty:
+                pass  # Idle refresh
+
+            # 'docker logs -f' ends when the container stops; reattach
+            if not follower.is_alive():
+                follower = _start_log_follower(log_lines)
+            _show_worker_state(log_lines, cgroup)
     except KeyboardInterrupt:
         print("\n👋 Monitoring stopped")
 
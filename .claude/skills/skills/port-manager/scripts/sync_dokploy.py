@@ -4,14 +4,29 @@ Dokploy Integration for Port Management
 Syncs port allocations with Dokploy deployments
 """
 
+import os
+import re
+import sys
 import json
-import subprocess
-import requests
 import argparse
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+    _loads = json.loads
+
 # Color codes
 RED = '\033[91m'
 GREEN = '\033[92m'
@@ -20,6 +35,26 @@ BLUE = '\033[94m'
 MAGENTA = '\033[95m'
 RESET = '\033[0m'
 
+# Host port of a compose short-syntax mapping, with optional bind IP and protocol
+_MAPPING_RE = re.compile(r'^(?:\d+(?:\.\d+){3}:)?(\d+)(?::\d+)?(?:/\w+)?$')
+
+
+@lru_cache(maxsize=256)
+def _exists(path: str) -> bool:
+    """Cached Path.exists() - avoids re-stat'ing slow volume mounts"""
+    return Path(path).exists()
+
+
+def _parse_ports(mapping_list: list) -> List[int]:
+    """Extract host ports from a compose service's port mappings"""
+    ports = []
+    for port_mapping in mapping_list:
+        # "3000", 3000, "8080:80", "127.0.0.1:8080:80", "8080:80/udp"
+        match = _MAPPING_RE.match(str(port_mapping))
+        if match:
+            ports.append(int(match.group(1)))
+    return ports
+
 class DokploySync:
     def __init__(self, registry_path: str = None, dokploy_url: str = None):
         """Initialize Dokploy sync"""
@@ -32,20 +67,23 @@ class DokploySync:
         # Dokploy API endpoint (adjust based on your setup)
         self.dokploy_url = dokploy_url or 'http://localhost:3000'
 
+        # Keep-alive HTTP session, created on first API call
+        self._http = None
+
     def load_registry(self) -> dict:
         """Load port registry"""
-        if not self.registry_path.exists():
+        if not _exists(str(self.registry_path)):
             print(f"{YELLOW}Warning: Registry not found at {self.registry_path}{RESET}")
             return {"allocations": {}}
 
-        with open(self.registry_path, 'r') as f:
-            return json.load(f)
+        with open(self.registry_path, 'rb') as f:
+            return _loads(f.read())
 
     def save_registry(self):
         """Save registry back to file"""
         self.registry['last_updated'] = datetime.now().strftime('%Y-%m-%d')
-        with open(self.registry_path, 'w') as f:
-            json.dump(self.registry, f, indent=2)
+        with open(self.registry_path, 'wb') as f:
+            f.write(_dumps(self.registry))
 
     def scan_docker_compose(self, compose_path: str = None) -> Dict[str, List[int]]:
         """Scan docker-compose files for port mappings"""
@@ -65,42 +103,36 @@ class DokploySync:
             ]
 
             for dir in search_dirs:
-                if dir.exists():
+                if _exists(str(dir)):
                     compose_files.extend(dir.glob('**/docker-compose*.y*ml'))
                     compose_files.extend(dir.glob('**/compose*.y*ml'))
 
+        # Per-file cache of parsed ports, keyed by path and invalidated on mtime change
+        cache = self.registry.setdefault('_compose_cache', {})
+
         for compose_file in compose_files:
             try:
+                key = str(compose_file)
+                mtime_ns = os.stat(compose_file).st_mtime_ns
+                cached = cache.get(key)
+                if cached and cached[0] == mtime_ns:
+                    services_ports.update(cached[1])
+                    continue
+
                 import yaml
                 with open(compose_file, 'r') as f:
                     compose_data = yaml.safe_load(f)
 
+                file_ports = {}
                 if 'services' in compose_data:
                     for service_name, service_config in compose_data['services'].items():
                         if 'ports' in service_config:
-                            ports = []
-                            for port_mapping in service_config['ports']:
-                                # Parse port mappings like "8080:80" or "3000"
-                                if isinstance(port_mapping, str):
-                                    if ':' in port_mapping:
-                                        host_port = port_mapping.split(':')[0]
-                                        # Handle IP:port format
-                                        if '.' in host_port:
-                                            host_port = host_port.split('.')[-1]
-                                        try:
-                                            ports.append(int(host_port))
-                                        except ValueError:
-                                            continue
-                                    else:
-                                        try:
-                                            ports.append(int(port_mapping))
-                                        except ValueError:
-                                            continue
-                                elif isinstance(port_mapping, int):
-                                    ports.append(port_mapping)
-
+                            ports = _parse_ports(service_config['ports'])
                             if ports:
-                                services_ports[service_name] = ports
+                                file_ports[service_name] = ports
+
+                cache[key] = [mtime_ns, file_ports]
+                services_ports.update(file_ports)
 
             except Exception as e:
                 print(f"{YELLOW}Warning: Could not parse {compose_file}: {e}{RESET}")
@@ -112,8 +144,11 @@ class DokploySync:
         apps = []
 
         try:
-            # Try to get Dokploy apps via API
-            response = requests.get(f"{self.dokploy_url}/api/apps", timeout=5)
+            # Try to get Dokploy apps via API (imported lazily - only this path needs it)
+            if self._http is None:
+                import requests
+                self._http = requests.Session()
+            response = self._http.get(f"{self.dokploy_url}/api/apps", timeout=5)
             if response.status_code == 200:
                 apps_data = response.json()
                 for app in apps_data:
@@ -127,6 +162,7 @@ class DokploySync:
         except:
             # Fallback to docker inspection
             try:
+                import subprocess
                 result = subprocess.run(
                     ['docker', 'ps', '--format', '{{.Names}}\t{{.Ports}}\t{{.Labels}}'],
                     capture_output=True,
@@ -143,7 +179,6 @@ class DokploySync:
 
                         # Check if managed by Dokploy
                         if 'dokploy' in name.lower() or 'dokploy' in labels.lower():
-                            import re
                             port_pattern = r'(\d+)->(\d+)'
                             matches = re.findall(port_pattern, ports)
                             for host_port, container_port in matches:
@@ -170,14 +205,19 @@ class DokploySync:
             'removed': []
         }
 
-        # Process Dokploy apps
+        allocs = self.registry.setdefault('allocations', {})
+        now = datetime.now().isoformat()
+
+        # Process Dokploy apps, collecting the active ports in the same pass
+        active_ports = set()
         for app in dokploy_apps:
             if app['port']:
                 port_str = str(app['port'])
+                active_ports.add(port_str)
 
-                if port_str in self.registry.get('allocations', {}):
+                if port_str in allocs:
                     # Update existing allocation
-                    existing = self.registry['allocations'][port_str]
+                    existing = allocs[port_str]
                     if existing.get('managed_by') != 'dokploy':
                         sync_report['conflicts'].append({
                             'port': app['port'],
@@ -187,13 +227,13 @@ class DokploySync:
                     else:
                         # Update status
                         if not dry_run:
-                            self.registry['allocations'][port_str]['status'] = app['status']
-                            self.registry['allocations'][port_str]['updated_at'] = datetime.now().isoformat()
+                            existing['status'] = app['status']
+                            existing['updated_at'] = now
                         sync_report['updated'].append(app['port'])
                 else:
                     # Add new allocation
                     if not dry_run:
-                        self.registry['allocations'][port_str] = {
+                        allocs[port_str] = {
                             'service': f"Dokploy: {app['name']}",
                             'description': f"Dokploy managed application",
                             'environment': app['environment'],
@@ -201,7 +241,7 @@ class DokploySync:
                             'managed_by': 'dokploy',
                             'owner': 'dokploy',
                             'status': app['status'],
-                            'allocated_at': datetime.now().isoformat()
+                            'allocated_at': now
                         }
                     sync_report['added'].append(app['port'])
 
@@ -210,9 +250,9 @@ class DokploySync:
             for port in ports:
                 port_str = str(port)
 
-                if port_str not in self.registry.get('allocations', {}):
+                if port_str not in allocs:
                     if not dry_run:
-                        self.registry['allocations'][port_str] = {
+                        allocs[port_str] = {
                             'service': f"Compose: {service_name}",
                             'description': f"Docker Compose service",
                             'environment': 'production',
@@ -220,23 +260,18 @@ class DokploySync:
                             'managed_by': 'docker-compose',
                             'owner': 'docker',
                             'status': 'active',
-                            'allocated_at': datetime.now().isoformat()
+                            'allocated_at': now
                         }
                     sync_report['added'].append(port)
 
         # Check for orphaned Dokploy allocations
-        active_ports = set()
-        for app in dokploy_apps:
-            if app['port']:
-                active_ports.add(str(app['port']))
-
-        for port_str, allocation in self.registry.get('allocations', {}).items():
+        for port_str, allocation in allocs.items():
             if allocation.get('managed_by') == 'dokploy' and port_str not in active_ports:
                 sync_report['removed'].append(int(port_str))
                 if not dry_run:
                     # Mark as inactive rather than delete
-                    self.registry['allocations'][port_str]['status'] = 'inactive'
-                    self.registry['allocations'][port_str]['notes'] = 'Dokploy app no longer active'
+                    allocation['status'] = 'inactive'
+                    allocation['notes'] = 'Dokploy app no longer active'
 
         if not dry_run:
             self.save_registry()
@@ -257,20 +292,21 @@ class DokploySync:
                 # Parse domain from URL
                 domain = url.replace('https://', '').replace('http://', '').split('/')[0]
 
-                nginx_config.append(f"# {service}")
-                nginx_config.append(f"server {{")
-                nginx_config.append(f"    server_name {domain};")
-                nginx_config.append(f"    listen 80;")
-                nginx_config.append(f"    listen 443 ssl;")
-                nginx_config.append(f"")
-                nginx_config.append(f"    location / {{")
-                nginx_config.append(f"        proxy_pass http://localhost:{port_str};")
-                nginx_config.append(f"        proxy_set_header Host $host;")
-                nginx_config.append(f"        proxy_set_header X-Real-IP $remote_addr;")
-                nginx_config.append(f"        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;")
-                nginx_config.append(f"        proxy_set_header X-Forwarded-Proto $scheme;")
-                nginx_config.append(f"    }}")
-                nginx_config.append(f"}}\n")
+                nginx_config.append(f"""# {service}
+server {{
+    server_name {domain};
+    listen 80;
+    listen 443 ssl;
+
+    location / {{
+        proxy_pass http://localhost:{port_str};
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+    }}
+}}
+""")
 
         return '\n'.join(nginx_config)
 
@@ -336,7 +372,8 @@ def main():
     elif args.nginx:
         # Generate Nginx config
         config = sync.generate_nginx_config()
-        print(config)
+        sys.stdout.write(config + '\n')
+        sys.stdout.flush()
 
         print(f"\n{BLUE}To apply this configuration:{RESET}")
         print(f"  1. Save to: /etc/nginx/sites-available/dokploy-services")
@@ -6,14 +6,34 @@ Archives old GeoPackage files to reduce sync payload
 
 import os
 import sys
+import time
+import shlex
 import subprocess
 import json
 from datetime import datetime, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+from ssh_base import SSH_MUX_OPTIONS
+
+# Files last modified before this date are archived unless --older-than is given
+DEFAULT_CUTOFF = '2025-12-01'
+
+# Reads NUL-separated paths on stdin, removes them and prints one summary line
+REMOVE_SCRIPT = (
+    "r=0; s=0; "
+    "while IFS= read -r -d '' p || [ -n \"$p\" ]; do "
+    "if [ -e \"$p\" ] && rm -f -- \"$p\"; then r=$((r+1)); else s=$((s+1)); fi; "
+    "done; echo \"REMOVED=$r SKIPPED=$s\""
+)
+
+# Project size cache - skips re-running du on directories whose mtime is unchanged
+SIZE_CACHE_PATH = Path.home() / '.cache' / 'qfc_sizes.json'
+SIZE_CACHE_MAX_AGE = 30 * 24 * 3600
+
 # Color formatting
 def colored(text, color, bold=False):
     """Simple colored text output"""
@@ -43,54 +63,120 @@ class ProjectArchiver:
         self.vps_host = os.getenv('QFIELDCLOUD_VPS_HOST', '72.61.166.168')
         self.vps_user = os.getenv('QFIELDCLOUD_VPS_USER', 'root')
         self.vps_password = os.getenv('QFIELDCLOUD_VPS_PASSWORD')
+        if self.vps_password:
+            # sshpass -e reads it from the environment, keeping it out of argv / ps
+            os.environ['SSHPASS'] = self.vps_password
         # The main problematic project
         self.target_project = '063a1964-42fe-4fe8-9113-291fd5e00c3d'
         self.storage_path = '/var/lib/docker/volumes/qfieldcloud_storage/_data'
+        self.size_cache = self.load_size_cache()
 
-    def execute_ssh_command(self, command, timeout=30):
-        """Execute command on VPS via SSH"""
-        ssh_cmd = ['ssh', '-o', 'StrictHostKeyChecking=no', '-o', 'ConnectTimeout=10']
+    def _size_cache_key(self, project_dir):
+        return f"{self.vps_host}:{project_dir}"
 
+    def load_size_cache(self):
+        """Load cached project sizes ({host:dir: {mtime, size, seen}})"""
+        try:
+            with open(SIZE_CACHE_PATH, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_size_cache(self):
+        """Save cached project sizes, evicting entries not seen for 30 days"""
+        cutoff = time.time() - SIZE_CACHE_MAX_AGE
+        self.size_cache = {
+            key: entry for key, entry in self.size_cache.items()
+            if entry.get('seen', 0) >= cutoff
+        }
+        try:
+            SIZE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(SIZE_CACHE_PATH, 'w') as f:
+                json.dump(self.size_cache, f)
+        except OSError as e:
+            print(colored(f"Warning: could not save size cache: {e}", "yellow"))
+
+    def build_ssh_command(self, command):
+        """Build the ssh argv for running command on the VPS"""
+        ssh_cmd = ['ssh', '-o', 'StrictHostKeyChecking=no', '-o', 'ConnectTimeout=10'] + SSH_MUX_OPTIONS
+
+        # Always ready to answer the password prompt: a ControlPath socket can
+        # expire or be stale, and with a live master sshpass is never asked
         if self.vps_password:
-            ssh_cmd = ['sshpass', '-p', self.vps_password] + ssh_cmd
+            ssh_cmd = ['sshpass', '-e'] + ssh_cmd
             ssh_cmd.extend(['-o', 'PubkeyAuthentication=no'])
 
         ssh_cmd.append(f'{self.vps_user}@{self.vps_host}')
         ssh_cmd.append(command)
+        return ssh_cmd
 
+    def execute_ssh_command(self, command, timeout=30):
+        """Execute command on VPS via SSH"""
         try:
-            result = subprocess.run(ssh_cmd, capture_output=True, text=True, timeout=timeout)
+            result = subprocess.run(self.build_ssh_command(command), capture_output=True, text=True, timeout=timeout)
             return result.stdout if result.returncode == 0 else None
         except Exception as e:
             print(colored(f"Error: {str(e)}", "red"))
             return None
 
+    def execute_ssh_with_stdin(self, command, payload, timeout=30):
+        """Execute command on VPS via SSH, feeding payload (bytes) on stdin"""
+        try:
+            result = subprocess.run(self.build_ssh_command(command), input=payload, capture_output=True, timeout=timeout)
+            return result.stdout.decode() if result.returncode == 0 else None
+        except Exception as e:
+            print(colored(f"Error: {str(e)}", "red"))
+            return None
+
     def find_projects(self):
         """Find all projects and their sizes"""
         print(colored("\n🔍 Finding QFieldCloud Projects", "cyan", bold=True))
         print("=" * 60)
 
-        # Find all project directories
-        cmd = f"""find {self.storage_path}/files -maxdepth 1 -type d -name '*-*-*-*' | head -20"""
+        # Project directories with their mtimes; du is only re-run for changed ones
+        cmd = f"find {self.storage_path}/files -maxdepth 1 -type d -name '*-*-*-*' -printf '%Ts\\t%p\\n' | head -20"
         projects = self.execute_ssh_command(cmd)
 
         if not projects:
             print(colored("No projects found", "yellow"))
             return []
 
+        now = time.time()
+        mtimes = {}
+        stale = []
+        for line in projects.splitlines():
+            if line:
+                mtime, project_dir = line.split('\t', 1)
+                mtimes[project_dir] = int(mtime)
+                cached = self.size_cache.get(self._size_cache_key(project_dir))
+                if not cached or cached['mtime'] != int(mtime):
+                    stale.append(project_dir)
+
+        if stale:
+            # Size all changed directories in one round-trip
+            payload = b'\0'.join(d.encode() for d in stale)
+            sizes = self.execute_ssh_with_stdin("xargs -0 -r du -sb 2>/dev/null || true", payload, timeout=300)
+            for line in (sizes or '').splitlines():
+                if line:
+                    size, project_dir = line.split('\t', 1)
+                    if project_dir in mtimes:
+                        self.size_cache[self._size_cache_key(project_dir)] = {
+                            'mtime': mtimes[project_dir],
+                            'size': int(size)
+                        }
+
         project_list = []
-        for project_dir in projects.strip().split('\n'):
-            if project_dir:
-                project_id = os.path.basename(project_dir)
-                # Get size
-                size_cmd = f"du -sb {project_dir} | awk '{{print $1}}'"
-                size = self.execute_ssh_command(size_cmd)
-                if size:
-                    project_list.append({
-                        'id': project_id,
-                        'path': project_dir,
-                        'size': int(size.strip())
-                    })
+        for project_dir, mtime in mtimes.items():
+            cached = self.size_cache.get(self._size_cache_key(project_dir))
+            if cached and cached['mtime'] == mtime:
+                cached['seen'] = now
+                project_list.append({
+                    'id': os.path.basename(project_dir),
+                    'path': project_dir,
+                    'size': cached['size']
+                })
+
+        self.save_size_cache()
 
         # Sort by size
         project_list.sort(key=lambda x: x['size'], reverse=True)
@@ -101,8 +187,12 @@ class ProjectArchiver:
 
         return project_list
 
-    def analyze_project_files(self, project_id=None):
-        """Analyze files in a specific project"""
+    def analyze_project_files(self, project_id=None, cutoff=DEFAULT_CUTOFF):
+        """Analyze files in a specific project
+
+        Files last modified before cutoff (YYYY-MM-DD) are candidates for
+        archiving; the split is done by find on the VPS.
+        """
         if not project_id:
             project_id = self.target_project
 
@@ -111,58 +201,101 @@ class ProjectArchiver:
 
         project_path = f"{self.storage_path}/files/{project_id}"
 
-        # Get all .gpkg files with dates
-        cmd = f"""find {project_path} -name '*.gpkg' -type f -exec ls -la {{}} \\; | awk '{{print $5, $9}}' | sort -rn"""
+        # One traversal, each file tagged R (recent) or O (old) by mtime
+        cmd = (f"find {project_path} -name '*.gpkg' -type f "
+               f"\\( -newermt '{cutoff}' -printf 'R\\t%s\\t%p\\n' -o -printf 'O\\t%s\\t%p\\n' \\)")
         files = self.execute_ssh_command(cmd)
 
         if not files:
             print("No GeoPackage files found")
             return [], []
 
-        file_list = []
-        total_size = 0
-        for line in files.strip().split('\n'):
-            if line:
-                parts = line.split(maxsplit=1)
-                if len(parts) == 2:
-                    size = int(parts[0])
-                    filepath = parts[1]
-                    filename = os.path.basename(filepath)
-                    file_list.append({
-                        'name': filename,
-                        'path': filepath,
-                        'size': size
-                    })
-                    total_size += size
-
-        print(f"Found {len(file_list)} GeoPackage files")
-        print(f"Total size: {format_size(total_size)}")
-
-        # Categorize files by date pattern
         old_files = []
         recent_files = []
-        for f in file_list:
-            # Check if filename contains date pattern (e.g., 241125 = Nov 24, 2025)
-            if any(month in f['name'].lower() for month in ['251125', '261125', '271125', '201125', '211125', '241125']):
-                old_files.append(f)
-            else:
-                recent_files.append(f)
+        for line in files.splitlines():
+            parts = line.split('\t', 2)
+            if len(parts) == 3:
+                tag, size, filepath = parts
+                (old_files if tag == 'O' else recent_files).append({
+                    'name': os.path.basename(filepath),
+                    'path': filepath,
+                    'size': int(size)
+                })
+
+        old_files.sort(key=lambda f: f['size'], reverse=True)
+        recent_files.sort(key=lambda f: f['size'], reverse=True)
 
         old_size = sum(f['size'] for f in old_files)
         recent_size = sum(f['size'] for f in recent_files)
 
-        print(f"\nNovember 2025 files: {len(old_files)} files, {format_size(old_size)}")
-        print(f"Recent/Other files: {len(recent_files)} files, {format_size(recent_size)}")
+        print(f"Found {len(old_files) + len(recent_files)} GeoPackage files")
+        print(f"Total size: {format_size(old_size + recent_size)}")
+
+        print(f"\nFiles older than {cutoff}: {len(old_files)} files, {format_size(old_size)}")
+        print(f"Recent files: {len(recent_files)} files, {format_size(recent_size)}")
 
         if old_files:
-            print("\nFiles to archive (November 2025):")
+            print(f"\nFiles to archive (older than {cutoff}):")
             for f in old_files[:10]:  # Show first 10
                 print(f"  {f['name']}: {format_size(f['size'])}")
 
         return old_files, recent_files
 
-    def create_archive(self, files_to_archive, project_id=None):
-        """Create tar.gz archive of specified files"""
+    def find_duplicates(self, files):
+        """Group files by content hash on the VPS
+
+        Returns (unique_files, duplicates) where duplicates maps the path of
+        each archived representative to the identical files it stands in for.
+        """
+        if len(files) < 2:
+            return files, {}
+
+        print(colored("\n🔁 Checking for Duplicate Snapshots", "cyan", bold=True))
+        print("=" * 60)
+
+        # xxhash when installed, sha1sum otherwise - one pass over all files
+        cmd = "if command -v xxhsum >/dev/null; then H=xxhsum; else H=sha1sum; fi; xargs -0 -r $H"
+        payload = b'\0'.join(f['path'].encode() for f in files)
+        output = self.execute_ssh_with_stdin(cmd, payload, timeout=300)
+        if not output:
+            print(colored("Could not hash files, archiving all of them", "yellow"))
+            return files, {}
+
+        hashes = {}
+        for line in output.splitlines():
+            # "<hash>  <path>"; names the tool had to escape (leading "\\") stay unique
+            digest, _, path = line.partition('  ')
+            if path and not digest.startswith('\\'):
+                hashes[path] = digest
+
+        unique_files = []
+        duplicates = {}
+        representative = {}
+        for f in files:
+            digest = hashes.get(f['path'])
+            if digest is None:
+                unique_files.append(f)
+            elif digest in representative:
+                duplicates.setdefault(representative[digest], []).append(f)
+            else:
+                representative[digest] = f['path']
+                unique_files.append(f)
+
+        duplicate_count = sum(len(d) for d in duplicates.values())
+        duplicate_size = sum(f['size'] for d in duplicates.values() for f in d)
+        print(f"Unique files: {len(unique_files)}")
+        print(f"Duplicates skipped: {duplicate_count} ({format_size(duplicate_size)})")
+
+        return unique_files, duplicates
+
+    def create_archive(self, files_to_archive, project_id=None, download_dir=None, remove_files=False):
+        """Create zstd-compressed tar archive of specified files
+
+        With download_dir, the tar stream is piped over SSH straight into a
+        local file instead of being written to the VPS disk. With remove_files,
+        tar unlinks each file on the VPS as soon as it is in the archive
+        (only for archives kept on the VPS).
+        """
         if not project_id:
             project_id = self.target_project
 
@@ -174,19 +307,26 @@ class ProjectArchiver:
         print("=" * 60)
 
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        archive_name = f"qfield_archive_{project_id[:8]}_{timestamp}.tar.gz"
-        archive_path = f"/root/{archive_name}"
+        archive_name = f"qfield_archive_{project_id[:8]}_{timestamp}.tar.zst"
+        if download_dir:
+            archive_path = os.path.join(download_dir, archive_name)
+        else:
+            archive_path = f"/root/{archive_name}"
 
-        # Create file list for tar
-        file_list = ' '.join([f"'{f['path']}'" for f in files_to_archive])
+        # NUL-separated file list fed to tar on stdin (no argv length limit or quoting issues)
+        file_list = b'\0'.join(f['path'].encode() for f in files_to_archive)
         total_size = sum(f['size'] for f in files_to_archive)
 
         print(f"Archiving {len(files_to_archive)} files ({format_size(total_size)})...")
         print(f"Archive: {archive_path}")
 
-        # Create archive
-        cmd = f"tar -czf {archive_path} {file_list} 2>/dev/null"
-        result = self.execute_ssh_command(cmd, timeout=300)
+        if download_dir:
+            return self._download_archive(archive_path, file_list, total_size)
+
+        # Create archive (multithreaded zstd is much faster than gzip on large .gpkg files)
+        remove_flag = '--remove-files ' if remove_files else ''
+        cmd = f"tar --use-compress-program='zstd -T0' {remove_flag}--null -T - -cf {archive_path} 2>/dev/null"
+        result = self.execute_ssh_with_stdin(cmd, file_list, timeout=300)
 
         # Check archive size
         size_cmd = f"ls -lh {archive_path} | awk '{{print $5}}'"
@@ -200,6 +340,26 @@ class ProjectArchiver:
             print(colored("❌ Archive creation failed", "red"))
             return None
 
+    def _download_archive(self, archive_path, file_list, total_size):
+        """Stream the remote tar straight into a local archive file"""
+        cmd = "tar --use-compress-program='zstd -T0' --null -T - -cf - 2>/dev/null"
+
+        try:
+            with open(archive_path, 'wb') as archive:
+                result = subprocess.run(self.build_ssh_command(cmd), input=file_list, stdout=archive, timeout=300)
+        except Exception as e:
+            print(colored(f"Error: {str(e)}", "red"))
+            result = None
+
+        archive_size = os.path.getsize(archive_path) if os.path.exists(archive_path) else 0
+        if result is None or result.returncode != 0 or not archive_size:
+            print(colored("❌ Archive creation failed", "red"))
+            return None
+
+        print(colored(f"✅ Archive created: {format_size(archive_size)}", "green"))
+        print(f"Compression ratio: {(1 - archive_size / total_size) * 100:.1f}%")
+        return archive_path
+
     def remove_archived_files(self, files_to_remove, dry_run=True):
         """Remove files that have been archived"""
         if not files_to_remove:
@@ -216,32 +376,80 @@ class ProjectArchiver:
                 print(f"  Would remove: {f['name']}")
         else:
             print(f"Removing {len(files_to_remove)} files...")
-            removed = 0
-            for f in files_to_remove:
-                cmd = f"rm -f '{f['path']}'"
-                if self.execute_ssh_command(cmd):
-                    removed += 1
+            # One round-trip: NUL-separated paths on stdin; the VPS does the
+            # counting and reports a single "REMOVED=<n> SKIPPED=<n>" summary
+            payload = b'\0'.join(f['path'].encode() for f in files_to_remove)
+            result = self.execute_ssh_with_stdin(REMOVE_SCRIPT, payload, timeout=120)
+            summary = dict(
+                field.partition('=')[::2] for field in (result or '').split() if '=' in field
+            )
+            removed = int(summary.get('REMOVED', 0))
+            skipped = int(summary.get('SKIPPED', 0))
+
+            if removed == len(files_to_remove):
+                print(colored(f"✅ Removed {removed} files, freed {format_size(total_size)}", "green"))
+            else:
+                print(colored(f"⚠️  Removed {removed} of {len(files_to_remove)} files ({skipped} skipped)", "yellow"))
 
-            print(colored(f"✅ Removed {removed} files, freed {format_size(total_size)}", "green"))
+    def create_restore_script(self, archive_path, files_archived, local=False, duplicates=None):
+        """Create a script to restore archived files if needed
 
-    def create_restore_script(self, archive_path, files_archived):
-        """Create a script to restore archived files if needed"""
+        duplicates (from find_duplicates) are re-created as copies of the
+        restored representative, reflinked where the filesystem supports it.
+        """
         if not archive_path:
             return
 
+        relink = ''.join(
+            f"cp --reflink=auto {shlex.quote(path)} {shlex.quote(dup['path'])}\n"
+            for path, dups in (duplicates or {}).items()
+            for dup in dups
+        )
+
         print(colored("\n📝 Creating Restore Script", "cyan", bold=True))
         print("=" * 60)
 
-        script_path = archive_path.replace('.tar.gz', '_restore.sh')
+        script_path = archive_path.replace('.tar.zst', '_restore.sh')
 
-        script_content = f"""#!/bin/bash
+        if local:
+            # Archive lives on this machine: stream it back to the VPS to extract
+            script_content = f"""#!/bin/bash
 # Restore script for archived QFieldCloud files
 # Created: {datetime.now()}
 # Archive: {archive_path}
 
 echo "Restoring {len(files_archived)} files from archive..."
-tar -xzf {archive_path} -C /
+ssh {self.vps_user}@{self.vps_host} "tar --use-compress-program=zstd -xf - -C /" < {archive_path}
+"""
+            if relink:
+                script_content += f"""
+echo "Re-creating duplicate snapshots..."
+ssh {self.vps_user}@{self.vps_host} 'bash -s' << 'RELINK'
+{relink}RELINK
+"""
+            script_content += """
+echo "Files restored. You may need to restart QFieldCloud services."
+"""
+            with open(script_path, 'w') as f:
+                f.write(script_content)
+            os.chmod(script_path, 0o755)
 
+            print(f"✅ Restore script: {script_path}")
+            return
+
+        script_content = f"""#!/bin/bash
+# Restore script for archived QFieldCloud files
+# Created: {datetime.now()}
+# Archive: {archive_path}
+
+echo "Restoring {len(files_archived)} files from archive..."
+tar --use-compress-program=zstd -xf {archive_path} -C /
+"""
+        if relink:
+            script_content += f"""
+echo "Re-creating duplicate snapshots..."
+{relink}"""
+        script_content += """
 echo "Files restored. You may need to restart QFieldCloud services."
 """
 
@@ -265,11 +473,20 @@ def main():
                        help='Only analyze files without archiving')
     parser.add_argument('--all-projects', action='store_true',
                        help='Analyze all projects')
+    parser.add_argument('--older-than', type=int, metavar='DAYS',
+                       help=f'Archive files not modified in DAYS days (default: before {DEFAULT_CUTOFF})')
+    parser.add_argument('--download-to', metavar='DIR',
+                       help='Stream the archive into a local directory instead of /root on the VPS')
 
     args = parser.parse_args()
 
     archiver = ProjectArchiver()
 
+    if args.older_than is not None:
+        cutoff = (datetime.now() - timedelta(days=args.older_than)).strftime('%Y-%m-%d')
+    else:
+        cutoff = DEFAULT_CUTOFF
+
     print(colored("📦 QFieldCloud File Archiver", "cyan", bold=True))
     print(f"Server: {archiver.vps_host}")
 
@@ -281,11 +498,11 @@ def main():
                 # Focus on the largest project
                 target = projects[0]
                 print(colored(f"\nFocusing on largest project: {target['id']}", "cyan"))
-                old_files, recent_files = archiver.analyze_project_files(target['id'])
+                old_files, recent_files = archiver.analyze_project_files(target['id'], cutoff)
         else:
             # Analyze target project
             project_id = args.project or archiver.target_project
-            old_files, recent_files = archiver.analyze_project_files(project_id)
+            old_files, recent_files = archiver.analyze_project_files(project_id, cutoff)
 
         if args.analyze_only:
             print(colored("\n✅ Analysis complete (no changes made)", "green"))
@@ -303,15 +520,28 @@ def main():
                     print("Aborted.")
                     return
 
+            # Identical snapshots are archived once and re-created on restore
+            unique_files, duplicates = archiver.find_duplicates(old_files)
+
             # Create archive
-            archive_path = archiver.create_archive(old_files, project_id)
+            # Archives kept on the VPS remove the originals in the same tar pass;
+            # downloaded archives are only removed once the local copy exists
+            remove_in_tar = not args.dry_run and not args.download_to
+            archive_path = archiver.create_archive(unique_files, project_id, download_dir=args.download_to,
+                                                   remove_files=remove_in_tar)
 
             if archive_path:
                 # Create restore script
-                archiver.create_restore_script(archive_path, old_files)
+                archiver.create_restore_script(archive_path, old_files, local=bool(args.download_to),
+                                               duplicates=duplicates)
 
                 # Remove files
-                archiver.remove_archived_files(old_files, dry_run=args.dry_run)
+                if remove_in_tar:
+                    print(colored(f"✅ Removed {len(unique_files)} archived files while archiving", "green"))
+                    duplicate_files = [f for dups in duplicates.values() for f in dups]
+                    archiver.remove_archived_files(duplicate_files, dry_run=False)
+                else:
+                    archiver.remove_archived_files(old_files, dry_run=args.dry_run)
 
                 if not args.dry_run:
                     print(colored("\n✅ Archiving completed successfully!", "green", bold=True))
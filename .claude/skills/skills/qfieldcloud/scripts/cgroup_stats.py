@@ -0,0 +1,75 @@
+"""
+QFieldCloud Container cgroup Stats
+Memory and CPU usage read straight from a container's cgroup v2 files,
+without a round-trip to dockerd
+"""
+
+import os
+import time
+
+# Where docker puts a container's cgroup: systemd driver, then cgroupfs driver
+CGROUP_DIRS = (
+    '/sys/fs/cgroup/system.slice/docker-{id}.scope',
+    '/sys/fs/cgroup/docker/{id}'
+)
+
+
+class CgroupStats:
+    """Memory and CPU readings for one container's cgroup
+
+    Reads raise OSError once the cgroup is gone (container removed or
+    recreated); resolve it again with for_container().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._last_cpu = None
+
+    @classmethod
+    def for_container(cls, container_id):
+        """CgroupStats for a full container ID, or None (no cgroup v2 directory)"""
+        if not container_id:
+            return None
+        for pattern in CGROUP_DIRS:
+            path = pattern.format(id=container_id)
+            if os.path.exists(os.path.join(path, 'memory.current')):
+                return cls(path)
+        return None
+
+    def _read(self, name):
+        with open(os.path.join(self.path, name)) as f:
+            return f.read()
+
+    def memory(self):
+        """Memory in use, in bytes, less reclaimable page cache (as docker stats shows it)"""
+        current = int(self._read('memory.current'))
+        for line in self._read('memory.stat').splitlines():
+            key, _, value = line.partition(' ')
+            if key == 'inactive_file':
+                return current - int(value)
+        return current
+
+    def cpu_usec(self):
+        """Total CPU time used, in microseconds"""
+        for line in self._read('cpu.stat').splitlines():
+            key, _, value = line.partition(' ')
+            if key == 'usage_usec':
+                return int(value)
+        return 0
+
+    def cpu_percent(self, interval=0.2):
+        """CPU use since the previous call, as a percentage of one CPU
+
+        The first call samples twice, interval seconds apart.
+        """
+        sample = (self.cpu_usec(), time.monotonic())
+        previous = self._last_cpu
+        if previous is None:
+            time.sleep(interval)
+            previous, sample = sample, (self.cpu_usec(), time.monotonic())
+        self._last_cpu = sample
+
+        elapsed = sample[1] - previous[1]
+        if elapsed <= 0:
+            return 0.0
+        return (sample[0] - previous[0]) / (elapsed * 1e6) * 100
@@ -0,0 +1,19 @@
+"""
+QFieldCloud Local Host
+Facts about the machine the local (non-SSH) scripts run on
+"""
+
+import socket
+
+
+def primary_ip():
+    """Address of the interface holding the default route (no packets are sent)"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(('10.254.254.254', 1))
+            return sock.getsockname()[0]
+    except OSError:
+        try:
+            return socket.gethostbyname(socket.gethostname())
+        except OSError:
+            return '127.0.0.1'
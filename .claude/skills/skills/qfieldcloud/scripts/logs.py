@@ -7,8 +7,12 @@ View and analyze logs from QFieldCloud Docker services
 import os
 import sys
 import re
+import shlex
 import argparse
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -16,11 +20,64 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
+from ssh_base import SSH_MUX_OPTIONS
+
+# Seconds a non-follow log fetch may take (per service searched)
+SSH_STREAM_TIMEOUT = 30
+
+# Log levels in priority order - the lowest-numbered group found in a line wins.
+# Patterns are bytes: log lines are colorized and written without decoding.
+_LEVEL_RE = re.compile(
+    rb'\b(?:(ERROR|FATAL|CRITICAL|Exception)'
+    rb'|(WARN|WARNING)'
+    rb'|(INFO|LOG)'
+    rb'|(DEBUG|TRACE)'
+    rb'|(SUCCESS|COMPLETED|DONE|OK|200|201)'
+    rb'|(404|500|502|503))\b',
+    re.IGNORECASE
+)
+
+# ISO timestamps anywhere, or the docker compose "service |" prefix
+_TIMESTAMP_RE = re.compile(rb'(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})|^(\S+\s+\|)')
+
+# view_service_logs --grep scans this many log lines per line requested
+GREP_SCAN_FACTOR = 100
+
+# search_logs: marker echoed before each service's matches
+SEARCH_SECTION_MARKER = '@@service '
+
+# Error categories in priority order - the first category present in a line wins
+_ERROR_CATEGORIES = [
+    ('Connection Error', r'ConnectionError|ECONNREFUSED'),
+    ('Timeout', r'TimeoutError|(?i:timeout)'),
+    ('Permission Denied', r'PermissionError|(?i:permission denied)'),
+    ('Database Error', r'DatabaseError|psycopg2'),
+    ('404 Not Found', r'404'),
+    ('500 Internal Server Error', r'500|Internal Server Error'),
+    ('502 Bad Gateway', r'502'),
+    ('Import Error', r'ImportError|ModuleNotFoundError'),
+    ('Code Error', r'KeyError|AttributeError'),
+]
+_ERROR_CATEGORY_RE = re.compile('|'.join(f'({pattern})' for _, pattern in _ERROR_CATEGORIES))
+
+def categorize_error(line):
+    """Classify an error log line into one of _ERROR_CATEGORIES (or 'Other')"""
+    best = None
+    for match in _ERROR_CATEGORY_RE.finditer(line):
+        if best is None or match.lastindex < best:
+            best = match.lastindex
+            if best == 1:
+                break
+    return _ERROR_CATEGORIES[best - 1][0] if best else 'Other'
+
 class QFieldCloudLogViewer:
     def __init__(self):
         self.vps_host = os.getenv('QFIELDCLOUD_VPS_HOST', '72.61.166.168')
         self.vps_user = os.getenv('QFIELDCLOUD_VPS_USER', 'root')
         self.vps_password = os.getenv('QFIELDCLOUD_VPS_PASSWORD')
+        if self.vps_password:
+            # sshpass -e reads it from the environment, keeping it out of argv / ps
+            os.environ['SSHPASS'] = self.vps_password
         self.project_path = os.getenv('QFIELDCLOUD_PROJECT_PATH', '/opt/qfieldcloud')
 
         # Docker services
@@ -47,26 +104,43 @@ class QFieldCloudLogViewer:
             'bold': '\033[1m'
         }
 
-    def execute_ssh_command(self, command):
-        """Execute command on VPS via SSH"""
+        self.ansi = {name: code.encode() for name, code in self.colors.items()}
+
+        # Color per _LEVEL_RE group (error, warning, info, debug, success, HTTP error)
+        self.level_colors = [
+            self.ansi['red'],
+            self.ansi['yellow'],
+            self.ansi['cyan'],
+            self.ansi['magenta'],
+            self.ansi['green'],
+            self.ansi['red']
+        ]
+
+    def build_ssh_command(self, command):
+        """Build the ssh argv for running command on the VPS"""
         ssh_cmd = ['ssh']
 
         ssh_options = [
             '-o', 'StrictHostKeyChecking=no',
             '-o', 'ConnectTimeout=10'
-        ]
+        ] + SSH_MUX_OPTIONS
         ssh_cmd.extend(ssh_options)
 
+        # Always ready to answer the password prompt: a ControlPath socket can
+        # expire or be stale, and with a live master sshpass is never asked
         if self.vps_password:
-            ssh_cmd = ['sshpass', '-p', self.vps_password] + ssh_cmd
+            ssh_cmd = ['sshpass', '-e'] + ssh_cmd
             ssh_cmd.extend(['-o', 'PubkeyAuthentication=no'])
 
         ssh_cmd.append(f'{self.vps_user}@{self.vps_host}')
         ssh_cmd.append(command)
+        return ssh_cmd
 
+    def execute_ssh_command(self, command):
+        """Execute command on VPS via SSH"""
         try:
             result = subprocess.run(
-                ssh_cmd,
+                self.build_ssh_command(command),
                 capture_output=True,
                 text=True,
                 timeout=30
@@ -75,45 +149,74 @@ class QFieldCloudLogViewer:
         except Exception as e:
             return False, str(e)
 
-    def colorize_log_level(self, line):
-        """Add colors to log levels"""
-        # Error levels
-        if re.search(r'\b(ERROR|FATAL|CRITICAL|Exception)\b', line, re.IGNORECASE):
-            return f"{self.colors['red']}{line}{self.colors['reset']}"
+    def execute_ssh_stream(self, command, binary=False, timeout=None):
+        """Execute command on VPS via SSH, yielding output lines as they arrive
+
+        With binary=True, lines are yielded as raw bytes. With a timeout, the
+        call is killed after that many seconds and subprocess.TimeoutExpired
+        is raised. Raises subprocess.CalledProcessError (with ssh's stderr)
+        once the output is exhausted if the remote command failed.
+        """
+        # stderr goes to a file so a chatty ssh can't block the stdout reader
+        errors = tempfile.TemporaryFile()
+        process = subprocess.Popen(
+            self.build_ssh_command(command),
+            stdout=subprocess.PIPE,
+            stderr=errors,
+            text=not binary,
+            bufsize=-1 if binary else 1
+        )
+        timed_out = threading.Event()
 
-        # Warning levels
-        elif re.search(r'\b(WARN|WARNING)\b', line, re.IGNORECASE):
-            return f"{self.colors['yellow']}{line}{self.colors['reset']}"
+        def expire():
+            timed_out.set()
+            process.kill()
 
-        # Info levels
-        elif re.search(r'\b(INFO|LOG)\b', line, re.IGNORECASE):
-            return f"{self.colors['cyan']}{line}{self.colors['reset']}"
+        timer = threading.Timer(timeout, expire) if timeout else None
+        if timer:
+            timer.start()
+        newline = b'\r\n' if binary else '\r\n'
+        try:
+            for line in process.stdout:
+                yield line.rstrip(newline)
+        finally:
+            if timer:
+                timer.cancel()
+            if process.poll() is None:
+                process.terminate()
+            process.wait()
+
+        if timed_out.is_set():
+            errors.close()
+            raise subprocess.TimeoutExpired(command, timeout)
+        if process.returncode != 0:
+            errors.seek(0)
+            stderr = errors.read().decode(errors='replace').strip()
+            errors.close()
+            raise subprocess.CalledProcessError(process.returncode, command, stderr=stderr)
+        errors.close()
 
-        # Debug levels
-        elif re.search(r'\b(DEBUG|TRACE)\b', line, re.IGNORECASE):
-            return f"{self.colors['magenta']}{line}{self.colors['reset']}"
+    def colorize_log_level(self, line):
+        """Add colors to log levels (line is bytes)"""
+        level = None
+        for match in _LEVEL_RE.finditer(line):
+            if level is None or match.lastindex < level:
+                level = match.lastindex
+                if level == 1:
+                    break
 
-        # Success patterns
-        elif re.search(r'\b(SUCCESS|COMPLETED|DONE|OK|200|201)\b', line, re.IGNORECASE):
-            return f"{self.colors['green']}{line}{self.colors['reset']}"
+        if level is None:
+            return line
 
-        # HTTP error codes
-        elif re.search(r'\b(404|500|502|503)\b', line):
-            return f"{self.colors['red']}{line}{self.colors['reset']}"
+        return self.level_colors[level - 1] + line + self.ansi['reset']
 
-        return line
+    def _color_timestamp(self, match):
+        color = self.ansi['blue'] if match.group(1) else self.ansi['yellow']
+        return color + match.group(0) + self.ansi['reset']
 
     def format_timestamp(self, line):
-        """Highlight timestamps in log lines"""
-        # ISO timestamps
-        pattern = r'(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})'
-        line = re.sub(pattern, f"{self.colors['blue']}\\1{self.colors['reset']}", line)
-
-        # Docker compose timestamps
-        pattern = r'^(\S+\s+\|)'
-        line = re.sub(pattern, f"{self.colors['yellow']}\\1{self.colors['reset']}", line)
-
-        return line
+        """Highlight timestamps in log lines (line is bytes)"""
+        return _TIMESTAMP_RE.sub(self._color_timestamp, line)
 
     def view_service_logs(self, service='all', lines=50, follow=False, grep=None):
         """View logs for specific service(s)"""
@@ -133,14 +236,21 @@ class QFieldCloudLogViewer:
         # Build docker compose logs command
         cmd_parts = [f'cd {self.project_path}', '&&', 'docker compose', 'logs']
 
+        # With --grep, the last N matching lines are shown rather than matches
+        # among the last N lines, so a wider (but still bounded) window is scanned
         if not follow:
-            cmd_parts.extend(['--tail', str(lines)])
+            cmd_parts.extend(['--tail', str(lines * GREP_SCAN_FACTOR if grep else lines)])
 
         if service_arg:
             cmd_parts.append(service_arg)
 
         if grep:
-            cmd_parts.extend(['2>&1', '|', 'grep', '-i', f'"{grep}"'])
+            # Filter and highlight on the VPS so only matching lines cross the wire
+            cmd_parts.extend(['2>&1', '|', 'grep', '--line-buffered', '--color=always',
+                              '-i', '-e', shlex.quote(grep)])
+            if not follow:
+                # Only the last N matches cross the wire
+                cmd_parts.extend(['|', 'tail', '-n', str(lines)])
 
         command = ' '.join(cmd_parts)
 
@@ -148,39 +258,33 @@ class QFieldCloudLogViewer:
             print(f"🔄 Following logs (Ctrl+C to stop)...")
             print("-" * 60)
 
-            # Use subprocess directly for real-time following
-            ssh_cmd = ['ssh']
-            ssh_options = ['-o', 'StrictHostKeyChecking=no', '-o', 'ConnectTimeout=10']
-            ssh_cmd.extend(ssh_options)
-
-            if self.vps_password:
-                ssh_cmd = ['sshpass', '-p', self.vps_password] + ssh_cmd
-                ssh_cmd.extend(['-o', 'PubkeyAuthentication=no'])
-
-            ssh_cmd.append(f'{self.vps_user}@{self.vps_host}')
-            ssh_cmd.append(command)
-
-            try:
-                process = subprocess.Popen(ssh_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                for line in process.stdout:
-                    formatted = self.colorize_log_level(line.rstrip())
-                    formatted = self.format_timestamp(formatted)
-                    print(formatted)
-            except KeyboardInterrupt:
-                print("\n\n✋ Log following stopped")
-                process.terminate()
-        else:
-            success, output = self.execute_ssh_command(command)
-
-            if not success:
-                print(f"❌ Failed to retrieve logs: {output}")
-                return False
-
-            # Process and display logs
-            for line in output.splitlines():
-                formatted = self.colorize_log_level(line)
-                formatted = self.format_timestamp(formatted)
-                print(formatted)
+        # Lines are displayed as they arrive rather than after the whole fetch,
+        # written as bytes straight to stdout with no decode/encode round-trip
+        sys.stdout.flush()
+        out = sys.stdout.buffer
+        stream = self.execute_ssh_stream(command, binary=True,
+                                         timeout=None if follow else SSH_STREAM_TIMEOUT)
+        try:
+            for line in stream:
+                if not grep:
+                    # (grep output is already highlighted by the remote grep)
+                    line = self.format_timestamp(self.colorize_log_level(line))
+                out.write(line + b'\n')
+                if follow:
+                    out.flush()
+        except KeyboardInterrupt:
+            print("\n\n✋ Log following stopped")
+        except subprocess.TimeoutExpired:
+            print(f"❌ Timed out retrieving logs after {SSH_STREAM_TIMEOUT}s")
+            return False
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Failed to retrieve logs (exit status {e.returncode})")
+            if e.stderr:
+                print(f"   {e.stderr}")
+            return False
+        finally:
+            stream.close()
+            out.flush()
 
         return True
 
@@ -189,36 +293,57 @@ class QFieldCloudLogViewer:
         print(f"\n🔍 Searching for: '{pattern}'")
         print("=" * 60)
 
-        services_to_search = []
-        if service:
-            services_to_search = [service]
-        else:
-            services_to_search = list(self.services.keys())
+        services_to_search = [service] if service else list(self.services.keys())
+
+        # One SSH script greps each service's logs in turn; a marker line
+        # ahead of each grep says which service the matches belong to
+        grep = f"grep -i -C {context_lines} -e {shlex.quote(pattern)}"
+        script = [f"cd {self.project_path} || exit 1"]
+        for svc in services_to_search:
+            script.append(f"echo {shlex.quote(SEARCH_SECTION_MARKER + svc)}")
+            # grep exits non-zero when there are no matches
+            script.append(f"docker compose logs --no-log-prefix --tail 500 {shlex.quote(svc)} 2>&1 | {grep} || true")
+        command = '\n'.join(script)
+
+        buckets = {svc: [] for svc in services_to_search}
+        current = None
+        try:
+            for line in self.execute_ssh_stream(command, timeout=SSH_STREAM_TIMEOUT * len(services_to_search)):
+                if line.startswith(SEARCH_SECTION_MARKER):
+                    current = buckets.get(line[len(SEARCH_SECTION_MARKER):])
+                elif line == '--':
+                    # grep separator between context groups
+                    continue
+                elif current is not None:
+                    current.append(line)
+        except subprocess.TimeoutExpired as e:
+            print(f"❌ Timed out searching logs after {e.timeout}s")
+            return False
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Failed to search logs (exit status {e.returncode})")
+            if e.stderr:
+                print(f"   {e.stderr}")
+            return False
 
         total_matches = 0
+        highlight = f"{self.colors['bold']}{self.colors['yellow']}\\1{self.colors['reset']}"
 
         for svc in services_to_search:
-            command = f"cd {self.project_path} && docker compose logs --tail 500 {svc} 2>&1 | grep -i -C {context_lines} '{pattern}'"
-            success, output = self.execute_ssh_command(command)
-
-            if success and output.strip():
-                print(f"\n📁 {svc} ({self.services[svc]}):")
-                print("-" * 40)
-
-                for line in output.splitlines():
-                    if pattern.lower() in line.lower():
-                        # Highlight the pattern
-                        highlighted = re.sub(
-                            f"({pattern})",
-                            f"{self.colors['bold']}{self.colors['yellow']}\\1{self.colors['reset']}",
-                            line,
-                            flags=re.IGNORECASE
-                        )
-                        print(highlighted)
-                        total_matches += 1
-                    else:
-                        # Context lines
-                        print(f"{self.colors['white']}{line}{self.colors['reset']}")
+            matched = buckets[svc]
+            if not matched:
+                continue
+
+            print(f"\n📁 {svc} ({self.services[svc]}):")
+            print("-" * 40)
+
+            for line in matched:
+                if pattern.lower() in line.lower():
+                    # Highlight the pattern
+                    print(re.sub(f"({pattern})", highlight, line, flags=re.IGNORECASE))
+                    total_matches += 1
+                else:
+                    # Context lines
+                    print(f"{self.colors['white']}{line}{self.colors['reset']}")
 
         print(f"\n📊 Found {total_matches} matches")
         return total_matches > 0
@@ -233,38 +358,22 @@ class QFieldCloudLogViewer:
 
         critical_services = ['app', 'nginx', 'worker_wrapper']
 
-        for service in critical_services:
+        def fetch_errors(service):
             command = f"cd {self.project_path} && docker compose logs --tail 1000 {service} 2>&1 | grep -E 'ERROR|Exception|Failed|Critical'"
-            success, output = self.execute_ssh_command(command)
+            return self.execute_ssh_command(command)
 
+        # Fetch all services concurrently; results come back in service order
+        with ThreadPoolExecutor(max_workers=len(critical_services)) as executor:
+            results = list(executor.map(fetch_errors, critical_services))
+
+        for service, (success, output) in zip(critical_services, results):
             if success and output.strip():
                 print(f"\n{service}:")
 
                 for line in output.splitlines()[:50]:  # Limit to 50 errors per service
                     total_errors += 1
 
-                    # Try to categorize the error
-                    if 'ConnectionError' in line or 'ECONNREFUSED' in line:
-                        error_type = 'Connection Error'
-                    elif 'TimeoutError' in line or 'timeout' in line.lower():
-                        error_type = 'Timeout'
-                    elif 'PermissionError' in line or 'permission denied' in line.lower():
-                        error_type = 'Permission Denied'
-                    elif 'DatabaseError' in line or 'psycopg2' in line:
-                        error_type = 'Database Error'
-                    elif '404' in line:
-                        error_type = '404 Not Found'
-                    elif '500' in line or 'Internal Server Error' in line:
-                        error_type = '500 Internal Server Error'
-                    elif '502' in line:
-                        error_type = '502 Bad Gateway'
-                    elif 'ImportError' in line or 'ModuleNotFoundError' in line:
-                        error_type = 'Import Error'
-                    elif 'KeyError' in line or 'AttributeError' in line:
-                        error_type = 'Code Error'
-                    else:
-                        error_type = 'Other'
-
+                    error_type = categorize_error(line)
                     error_patterns[error_type] = error_patterns.get(error_type, 0) + 1
 
         if error_patterns:
@@ -294,8 +403,9 @@ class QFieldCloudLogViewer:
         scp_cmd = ['scp']
 
         if self.vps_password:
-            scp_cmd = ['sshpass', '-p', self.vps_password] + scp_cmd
+            scp_cmd = ['sshpass', '-e'] + scp_cmd
 
+        scp_cmd.extend(SSH_MUX_OPTIONS)
         scp_cmd.extend([
             f'{self.vps_user}@{self.vps_host}:/tmp/qfield_logs.txt',
             output_file
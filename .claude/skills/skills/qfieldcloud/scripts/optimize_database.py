@@ -147,6 +147,22 @@ class DatabaseOptimizer:
                 print(result)
             return False
 
+    def index_is_invalid(self, index_name):
+        """Whether index_name exists but is marked INVALID (a failed concurrent build)"""
+        cmd = f"""docker exec {self.db_container} psql -U {self.db_user} -d {self.db_name} -tA -c "
+            SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('{index_name}');" 2>&1"""
+
+        result = self.execute_ssh_command(cmd)
+        return bool(result) and result.strip() == 'f'
+
+    def drop_index(self, index_name):
+        """Drop index_name without blocking writes to its table"""
+        cmd = f"""docker exec {self.db_container} psql -U {self.db_user} -d {self.db_name} -c "
+            DROP INDEX CONCURRENTLY IF EXISTS {index_name};" 2>&1"""
+
+        result = self.execute_ssh_command(cmd, timeout=300)
+        return bool(result) and "DROP INDEX" in result
+
     def add_performance_indexes(self):
         """Add indexes for common query patterns"""
         print(colored("\n📈 Adding Performance Indexes", "cyan", bold=True))
@@ -154,6 +170,7 @@ class DatabaseOptimizer:
 
         indexes = [
             ("idx_job_status_created", "core_job(status, created_at)", "Speed up job queue queries"),
+            ("idx_job_pending_created", "core_job(created_at) WHERE status IN ('pending', 'queued')", "Speed up pending/stuck job queries"),
             ("idx_job_project_created", "core_job(project_id, created_at)", "Speed up project job queries"),
             ("idx_job_type_status", "core_job(type, status)", "Speed up job type filtering"),
             ("idx_job_started_at", "core_job(started_at) WHERE started_at IS NOT NULL", "Speed up active job queries"),
@@ -163,18 +180,28 @@ class DatabaseOptimizer:
         created = 0
         for index_name, index_def, description in indexes:
             print(f"\nCreating {index_name}: {description}")
+            # A failed or interrupted concurrent build leaves an INVALID index
+            # that IF NOT EXISTS would skip forever; drop it and build again
+            if self.index_is_invalid(index_name):
+                print(colored(f"  ⚠️ Dropping invalid leftover: {index_name}", "yellow"))
+                self.drop_index(index_name)
+
+            # CONCURRENTLY so the live app and worker keep writing to core_job during the build
             cmd = f"""docker exec {self.db_container} psql -U {self.db_user} -d {self.db_name} -c "
-                CREATE INDEX IF NOT EXISTS {index_name} ON {index_def};" 2>&1"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {index_def};" 2>&1"""
 
-            result = self.execute_ssh_command(cmd)
+            result = self.execute_ssh_command(cmd, timeout=300)
             if result:
-                if "CREATE INDEX" in result:
+                # psql echoes CREATE INDEX after the "already exists, skipping" notice too
+                if "already exists" in result.lower():
+                    print(f"  ℹ️ Already exists: {index_name}")
+                elif "CREATE INDEX" in result:
                     print(colored(f"  ✅ Created: {index_name}", "green"))
                     created += 1
-                elif "already exists" in result.lower():
-                    print(f"  ℹ️ Already exists: {index_name}")
                 else:
                     print(colored(f"  ⚠️ Issue with {index_name}", "yellow"))
+            else:
+                print(colored(f"  ⚠️ Issue with {index_name}", "yellow"))
 
         print(f"\n✅ Created {created} new indexes")
         return True
@@ -4,11 +4,11 @@ QFieldCloud Automated Remediation System
 Executes fixes for common QField issues with safety checks
 """
 
-import os
 import sys
 import json
 import argparse
-import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Tuple
@@ -17,19 +17,29 @@ from typing import Dict, List, Tuple
 from dotenv import load_dotenv
 load_dotenv()
 
+from ssh_base import SSHBase
+from status import StatusCache, iter_containers
 
-class QFieldCloudRemediation:
+# Fixes run at once by diagnose_and_fix (keeps load on the docker daemon down)
+MAX_PARALLEL_FIXES = 3
+
+
+class QFieldCloudRemediation(SSHBase):
     """Automated remediation for common QFieldCloud issues"""
 
     def __init__(self, dry_run=False):
-        self.vps_host = os.getenv('QFIELDCLOUD_VPS_HOST', '72.61.166.168')
-        self.vps_user = os.getenv('QFIELDCLOUD_VPS_USER', 'root')
-        self.vps_password = os.getenv('QFIELDCLOUD_VPS_PASSWORD')
-        self.project_path = os.getenv('QFIELDCLOUD_PROJECT_PATH', '/opt/qfieldcloud')
+        super().__init__()
         self.dry_run = dry_run
 
-        # Remediation history
+        # Remediation history (appended to from concurrent fixes)
         self.actions_taken = []
+        self._actions_lock = threading.Lock()
+
+        # Status cached by status.py, stale once a fix succeeds
+        self._cache = StatusCache(self.vps_host)
+
+        # Compose service -> container state, shared by the fix_* methods
+        self._container_state = None
 
     def execute_ssh_command(self, command: str) -> Tuple[bool, str, str]:
         """Execute command on VPS via SSH"""
@@ -37,62 +47,53 @@ class QFieldCloudRemediation:
             print(f"[DRY RUN] Would execute: {command}")
             return True, "dry-run-success", ""
 
-        ssh_cmd = ['ssh']
-
-        ssh_options = [
-            '-o', 'StrictHostKeyChecking=no',
-            '-o', 'ConnectTimeout=10'
-        ]
-
-        # Use SSH key if no password provided
-        if not self.vps_password:
-            ssh_key_path = os.path.expanduser('~/.ssh/qfield_vps')
-            if os.path.exists(ssh_key_path):
-                ssh_options.extend(['-i', ssh_key_path])
+        # 2 min timeout for potentially long operations
+        return self.execute(command, timeout=120)
 
-        ssh_cmd.extend(ssh_options)
-
-        if self.vps_password:
-            ssh_cmd = ['sshpass', '-p', self.vps_password] + ssh_cmd
-            ssh_cmd.extend(['-o', 'PubkeyAuthentication=no'])
-
-        ssh_cmd.append(f'{self.vps_user}@{self.vps_host}')
-        ssh_cmd.append(command)
-
-        try:
-            result = subprocess.run(
-                ssh_cmd,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 min timeout for potentially long operations
+    def log_action(self, action: str, success: bool, details: str = ""):
+        """Log remediation action"""
+        with self._actions_lock:
+            self.actions_taken.append({
+                "timestamp": datetime.now().isoformat(),
+                "action": action,
+                "success": success,
+                "details": details
+            })
+
+        if success and not self.dry_run:
+            self._cache.invalidate()
+
+    def _refresh_container_state(self, force: bool = False) -> Dict[str, str]:
+        """Container state per compose service, from one 'docker compose ps' per run"""
+        if self._container_state is None or force:
+            # Read-only, so it runs for real even in dry-run mode
+            success, stdout, _ = self.execute(
+                f"cd {self.project_path} && docker compose ps -a --format json"
             )
+            self._container_state = {}
+            if success:
+                for container in iter_containers(stdout):
+                    self._container_state.setdefault(container.get('Service'), container.get('State', 'unknown'))
+        return self._container_state
 
-            return result.returncode == 0, result.stdout, result.stderr
+    def _mark_running(self, service: str):
+        """Record a successful (re)start in the container state memo"""
+        if self._container_state is not None:
+            self._container_state[service] = 'running'
 
-        except subprocess.TimeoutExpired:
-            return False, "", "Command timed out"
-        except Exception as e:
-            return False, "", str(e)
+    def fix_worker_down(self, worker_state: str = None) -> Dict:
+        """Fix: Worker container not running
 
-    def log_action(self, action: str, success: bool, details: str = ""):
-        """Log remediation action"""
-        self.actions_taken.append({
-            "timestamp": datetime.now().isoformat(),
-            "action": action,
-            "success": success,
-            "details": details
-        })
-
-    def fix_worker_down(self) -> Dict:
-        """Fix: Worker container not running"""
+        worker_state: container state already observed by the caller
+        ('missing' if there is no container); probed when not given.
+        """
         print("\n🔧 Fixing worker container...")
 
         # 1. Check if worker exists but stopped
-        success, stdout, _ = self.execute_ssh_command(
-            f"cd {self.project_path} && docker compose ps worker_wrapper --format json"
-        )
+        if worker_state is None:
+            worker_state = self._refresh_container_state().get('worker_wrapper', 'missing')
 
-        if success and stdout:
+        if worker_state != 'missing':
             # Worker exists, just restart
             print("   ↳ Worker container exists, restarting...")
             success, stdout, stderr = self.execute_ssh_command(
@@ -100,6 +101,7 @@ class QFieldCloudRemediation:
             )
 
             if success:
+                self._mark_running('worker_wrapper')
                 self.log_action("restart_worker", True, "Worker container restarted")
                 return {"fixed": True, "action": "restarted_worker", "message": "Worker container restarted successfully"}
             else:
@@ -113,22 +115,25 @@ class QFieldCloudRemediation:
             )
 
             if success:
+                self._mark_running('worker_wrapper')
                 self.log_action("rebuild_worker", True, "Worker container rebuilt")
                 return {"fixed": True, "action": "rebuilt_worker", "message": "Worker container rebuilt and started (15 min build time)"}
             else:
                 self.log_action("rebuild_worker", False, stderr)
                 return {"fixed": False, "action": "rebuild_worker", "error": stderr}
 
-    def fix_database_connection(self) -> Dict:
-        """Fix: Database connection issues"""
+    def fix_database_connection(self, db_state: str = None) -> Dict:
+        """Fix: Database connection issues
+
+        db_state: container state already observed by the caller; probed when not given.
+        """
         print("\n🔧 Fixing database connection...")
 
         # 1. Check if database container is running
-        success, stdout, _ = self.execute_ssh_command(
-            f"cd {self.project_path} && docker compose ps db --format json"
-        )
+        if db_state is None:
+            db_state = self._refresh_container_state().get('db', 'missing')
 
-        if not success or "running" not in stdout.lower():
+        if db_state != 'running':
             # Database container not running
             print("   ↳ Database container down, starting...")
             success, stdout, stderr = self.execute_ssh_command(
@@ -136,6 +141,7 @@ class QFieldCloudRemediation:
             )
 
             if success:
+                self._mark_running('db')
                 self.log_action("start_database", True, "Database container started")
                 return {"fixed": True, "action": "started_database", "message": "Database container started"}
             else:
@@ -149,6 +155,7 @@ class QFieldCloudRemediation:
         )
 
         if success:
+            self._mark_running('db')
             self.log_action("restart_database", True, "Database container restarted")
             return {"fixed": True, "action": "restarted_database", "message": "Database restarted"}
         else:
@@ -164,6 +171,7 @@ class QFieldCloudRemediation:
         )
 
         if success:
+            self._mark_running(service)
             self.log_action(f"restart_{service}", True, f"{service} restarted")
             return {"fixed": True, "action": f"restarted_{service}", "message": f"{service} service restarted"}
         else:
@@ -174,23 +182,26 @@ class QFieldCloudRemediation:
         """Fix: Queue stuck with old jobs"""
         print("\n🔧 Cleaning stuck queue jobs...")
 
-        # Mark jobs stuck >24 hours as failed
-        command = f"""docker exec qfieldcloud-db-1 psql -U qfieldcloud_db_admin -d qfieldcloud_db -c \
-            "UPDATE core_job SET status = 'failed', finished_at = NOW(), \
-             output = 'Auto-cleanup: stuck >24 hours' \
-             WHERE status IN ('pending', 'queued') \
-             AND created_at < NOW() - INTERVAL '24 hours';"
+        # Mark jobs stuck >24 hours as failed; -tA prints just the count
+        command = f"""docker exec {self.db_container} psql -U qfieldcloud_db_admin -d qfieldcloud_db -tA -c \
+            "WITH updated AS ( \
+                UPDATE core_job SET status = 'failed', finished_at = NOW(), \
+                 output = 'Auto-cleanup: stuck >24 hours' \
+                 WHERE status IN ('pending', 'queued') \
+                 AND created_at < NOW() - INTERVAL '24 hours' \
+                 RETURNING 1 \
+             ) SELECT count(*) FROM updated;"
         """
 
         success, stdout, stderr = self.execute_ssh_command(command)
 
         if success:
             # Count cleaned jobs
-            try:
-                cleaned_count = stdout.strip().split()[-1]  # "UPDATE 5" -> "5"
+            cleaned_count = stdout.strip()
+            if cleaned_count.isdigit():
                 self.log_action("clean_stuck_queue", True, f"Cleaned {cleaned_count} stuck jobs")
                 return {"fixed": True, "action": "cleaned_queue", "message": f"Cleaned {cleaned_count} stuck jobs (>24h old)"}
-            except:
+            else:
                 self.log_action("clean_stuck_queue", True, "Queue cleaned")
                 return {"fixed": True, "action": "cleaned_queue", "message": "Stuck queue jobs cleaned"}
         else:
@@ -234,6 +245,7 @@ class QFieldCloudRemediation:
         )
 
         if success:
+            self._mark_running(service)
             self.log_action(f"restart_{service}_memory", True, "Service restarted to free memory")
             return {
                 "fixed": True,
@@ -254,35 +266,59 @@ class QFieldCloudRemediation:
         monitor = QFieldCloudMonitor()
         status = monitor.get_status()
 
+        # Without diagnostics every service looks down; fixing on that basis
+        # would restart a healthy database and worker
+        if status.get('error'):
+            print(f"❌ Diagnostics failed: {status['error']}; no fixes applied")
+            return {
+                "diagnostics": status,
+                "fixes_applied": [],
+                "fixes_failed": [],
+                "all_actions": self.actions_taken,
+                "success": False,
+                "error": f"Diagnostics failed: {status['error']}"
+            }
+
         fixes_applied = []
         fixes_failed = []
 
-        # Analyze status and apply fixes
-        if not status.get('worker_healthy'):
-            result = self.fix_worker_down()
-            if result['fixed']:
-                fixes_applied.append(result)
-            else:
-                fixes_failed.append(result)
-
+        # Container states seen by the monitor, so fixes don't re-probe them
+        # (they probe once themselves if the monitor couldn't list containers)
+        if status.get('containers'):
+            self._container_state = dict(status['containers'])
+
+        # Analyze status and pick fixes. Container fixes run first; the queue
+        # cleanup needs the database back up, and the prune must not run while
+        # containers are being restarted (it removes stopped containers/volumes)
+        container_fixes = []
+        # Database before worker: both act on the same compose project, and
+        # bringing the worker up also starts its db dependency
         if not status.get('database_healthy'):
-            result = self.fix_database_connection()
-            if result['fixed']:
-                fixes_applied.append(result)
-            else:
-                fixes_failed.append(result)
+            container_fixes.append(self.fix_database_connection)
+
+        if not status.get('worker_healthy'):
+            container_fixes.append(self.fix_worker_down)
 
+        cleanup_fixes = []
         # Check for stuck queue
         if status.get('queue_depth', 0) > 10:
-            result = self.fix_stuck_queue()
-            if result['fixed']:
-                fixes_applied.append(result)
-            else:
-                fixes_failed.append(result)
+            cleanup_fixes.append(self.fix_stuck_queue)
 
         # Check disk space
         if status.get('disk_usage_pct', 0) > 90:
-            result = self.fix_disk_space()
+            cleanup_fixes.append(self.fix_disk_space)
+
+        # Load the state once up front rather than racing to probe it per fix
+        if container_fixes:
+            self._refresh_container_state()
+
+        # Container fixes one at a time, in order; the cleanup fixes are
+        # independent of each other and run concurrently
+        results = [fix() for fix in container_fixes]
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_FIXES) as executor:
+            results.extend(executor.map(lambda fix: fix(), cleanup_fixes))
+
+        for result in results:
             if result['fixed']:
                 fixes_applied.append(result)
             else:
@@ -0,0 +1,103 @@
+"""
+QFieldCloud SSH Base
+Shared VPS connection settings and SSH execution for the qfieldcloud scripts
+"""
+
+import os
+import subprocess
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv()
+
+# Reuse one SSH connection across calls (first call becomes the master)
+SSH_MUX_OPTIONS = [
+    '-o', 'ControlMaster=auto',
+    '-o', 'ControlPath=/tmp/qfc-%r@%h:%p',
+    '-o', 'ControlPersist=60'
+]
+
+# Shorter handshake for the first (master) connection: fast AEAD ciphers first,
+# keepalives over SSH instead of TCP. Set 'UseDNS no' in the VPS's
+# /etc/ssh/sshd_config as well so sshd skips the reverse lookup of this host.
+SSH_HANDSHAKE_OPTIONS = [
+    '-o', 'Ciphers=aes128-gcm@openssh.com,aes256-gcm@openssh.com,chacha20-poly1305@openssh.com,aes128-ctr',
+    '-o', 'ServerAliveInterval=30',
+    '-o', 'TCPKeepAlive=no'
+]
+
+
+class SSHBase:
+    """VPS connection settings plus a single SSH execution path"""
+
+    def __init__(self):
+        self.vps_host = os.getenv('QFIELDCLOUD_VPS_HOST', '72.61.166.168')
+        self.vps_user = os.getenv('QFIELDCLOUD_VPS_USER', 'root')
+        self.vps_password = os.getenv('QFIELDCLOUD_VPS_PASSWORD')
+        if self.vps_password:
+            # sshpass -e reads it from the environment, keeping it out of argv / ps
+            os.environ['SSHPASS'] = self.vps_password
+        self.project_path = os.getenv('QFIELDCLOUD_PROJECT_PATH', '/opt/qfieldcloud')
+
+        # Database container, for 'docker exec' without compose project resolution
+        self.db_container = os.getenv('QFIELDCLOUD_DB_CONTAINER', 'qfieldcloud-db-1')
+
+        # SSH key, resolved once rather than on every command
+        ssh_key_path = os.path.expanduser('~/.ssh/qfield_vps')
+        self._ssh_key = ssh_key_path if os.path.exists(ssh_key_path) else None
+
+        # Everything before the remote command, built once
+        self._ssh_prefix = self._build_ssh_prefix()
+
+    def _build_ssh_prefix(self):
+        """ssh argv up to (not including) the remote command"""
+        ssh_cmd = ['ssh']
+
+        # Password logins share the master too: sshpass only has to answer
+        # the prompt of the first connection, later calls attach to its socket
+        ssh_options = [
+            '-o', 'StrictHostKeyChecking=no',
+            '-o', 'ConnectTimeout=10'
+        ] + SSH_MUX_OPTIONS + SSH_HANDSHAKE_OPTIONS
+
+        # Use SSH key if no password provided; offer only that key so the
+        # client doesn't try every agent/default key first
+        if not self.vps_password and self._ssh_key:
+            ssh_options.extend([
+                '-i', self._ssh_key,
+                '-o', 'IdentitiesOnly=yes',
+                '-o', 'PreferredAuthentications=publickey'
+            ])
+
+        ssh_cmd.extend(ssh_options)
+
+        if self.vps_password:
+            ssh_cmd = ['sshpass', '-e'] + ssh_cmd
+            ssh_cmd.extend([
+                '-o', 'PubkeyAuthentication=no',
+                '-o', 'PreferredAuthentications=password,keyboard-interactive'
+            ])
+
+        ssh_cmd.append(f'{self.vps_user}@{self.vps_host}')
+        return tuple(ssh_cmd)
+
+    def build_ssh_command(self, command):
+        """Build the ssh argv for running command on the VPS"""
+        return [*self._ssh_prefix, command]
+
+    def execute(self, command, timeout=30):
+        """Execute command on VPS via SSH, returning (success, stdout, stderr)"""
+        try:
+            result = subprocess.run(
+                self.build_ssh_command(command),
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+
+            return result.returncode == 0, result.stdout, result.stderr
+
+        except subprocess.TimeoutExpired:
+            return False, "", "Command timed out"
+        except Exception as e:
+            return False, "", str(e)